@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+
+"""
+Query Workload Benchmark Script
+This script loads generated datasets at several scales into a local Postgres
+and times the chat helper functions, the room timeline query and meeting
+calendar/presence queries, reporting latency percentiles and EXPLAIN (ANALYZE, BUFFERS) plans as JSON.
+"""
+
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+import argparse
+
+try:
+    import psycopg
+    from psycopg import sql
+except ImportError:  # Reported by main()
+    psycopg = None
+
+GENERATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generate-test-data.py')
+
+# Tables whose row counts are recorded with each scale
+COUNTED_TABLES = ('user_profiles', 'rooms', 'room_participants', 'messages', 'message_status',
+                  'message_reactions', 'user_presence', 'meetings', 'meeting_participants')
+
+# Candidate parameters drawn per scale; ordering by random uuids makes the samples
+# arbitrary but identical for identical datasets
+SAMPLE_SIZE = 1000
+
+# Messages a chat screen fetches per page
+TIMELINE_PAGE_SIZE = 50
+
+# Users per get_users_presence call, roughly a contact list screen
+PRESENCE_BATCH_SIZE = 50
+
+ROOM_TIMELINE_SQL = (f"SELECT id, user_id, content, type, reply_to, created_at FROM messages "
+                     f"WHERE room_id = %(room_id)s ORDER BY created_at DESC LIMIT {TIMELINE_PAGE_SIZE}")
+
+# A calendar view: the next meetings within a day of an instant
+UPCOMING_MEETINGS_SQL = (f"SELECT id, room_id, title, scheduled_for FROM meetings "
+                         f"WHERE scheduled_for >= %(at)s AND scheduled_for < %(at)s + interval '1 day' "
+                         f"ORDER BY scheduled_for LIMIT {TIMELINE_PAGE_SIZE}")
+
+# Participants in a meeting at an instant. Generated meetings last at most two
+# hours, which bounds the joined_at range scan
+MEETING_PRESENCE_SQL = ("SELECT count(*) FROM meeting_participants "
+                        "WHERE joined_at <= %(at)s AND joined_at > %(at)s - interval '3 hours' "
+                        "AND (left_at IS NULL OR left_at > %(at)s)")
+
+# name -> (query, helper function whose body is also explained, parameter pool)
+QUERIES = {
+    'get_unread_count': ('SELECT get_unread_count(%(room_id)s, %(user_id)s)', 'get_unread_count', 'memberships'),
+    'mark_room_messages_read': ('SELECT mark_room_messages_read(%(room_id)s, %(user_id)s)',
+                                'mark_room_messages_read', 'memberships'),
+    'get_room_stats': ('SELECT * FROM get_room_stats(%(room_id)s)', 'get_room_stats', 'memberships'),
+    'get_shared_rooms': ('SELECT * FROM get_shared_rooms(%(user1)s, %(user2)s)', 'get_shared_rooms', 'direct_pairs'),
+    'get_users_presence': ('SELECT * FROM get_users_presence(%(user_ids)s::uuid[])', 'get_users_presence',
+                           'user_batches'),
+    'search_user_messages': ('SELECT * FROM search_user_messages(%(user_id)s, %(query)s)', 'search_user_messages',
+                             'searches'),
+    'room_timeline': (ROOM_TIMELINE_SQL, None, 'memberships'),
+    'upcoming_meetings': (UPCOMING_MEETINGS_SQL, None, 'meeting_times'),
+    'meeting_presence': (MEETING_PRESENCE_SQL, None, 'meeting_times'),
+}
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    """Summarize latencies in seconds as millisecond statistics"""
+    ms = sorted(s * 1000 for s in samples)
+    cuts = statistics.quantiles(ms, n=100, method='inclusive') if len(ms) > 1 else ms * 99
+    return {
+        'iterations': len(ms),
+        'mean_ms': round(statistics.fmean(ms), 4),
+        'p50_ms': round(cuts[49], 4),
+        'p95_ms': round(cuts[94], 4),
+        'p99_ms': round(cuts[98], 4),
+        'max_ms': round(ms[-1], 4),
+    }
+
+
+class QueryBenchmark:
+    """Times the chat query workload against whatever dataset is loaded"""
+
+    def __init__(self, dsn: str, iterations: int = 200, warmup: int = 10, seed: int = 0,
+                 search_terms: Optional[List[str]] = None):
+        self.dsn = dsn
+        self.iterations = iterations
+        self.warmup = warmup
+        self.seed = seed
+        # Terms with known match counts, e.g. generator needles; sampled words otherwise
+        self.search_terms = search_terms
+
+    def run(self, explain: bool = True) -> Dict[str, Any]:
+        """Benchmark every query, returning row counts and per-query results"""
+        with psycopg.connect(self.dsn, autocommit=True) as conn:
+            conn.execute('ANALYZE')
+            pools = self._parameter_pools(conn)
+            results = {
+                'rows': {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                         for table in COUNTED_TABLES},
+                'messages_bytes': dict(zip(('table', 'indexes'), conn.execute(
+                    "SELECT pg_relation_size('messages'), pg_indexes_size('messages')").fetchone())),
+                'queries': {},
+            }
+
+            for name, (query, function, pool) in QUERIES.items():
+                if not pools[pool]:
+                    print(f"⏭️ {name}: no {pool} in the dataset, skipped")
+                    continue
+                rng = random.Random(f'{self.seed}:{name}')
+                stats = _percentiles(self._time_query(conn, query, pools[pool], rng))
+                if explain:
+                    params = pools[pool][0]
+                    stats['plan'] = self._explain(conn, query, params)
+                    if function is not None:
+                        stats['function_plan'] = self._explain_function(conn, function, params)
+                results['queries'][name] = stats
+                print(f"⏱️ {name}: p50 {stats['p50_ms']:.2f}ms, p95 {stats['p95_ms']:.2f}ms, "
+                      f"p99 {stats['p99_ms']:.2f}ms")
+
+        return results
+
+    def _parameter_pools(self, conn) -> Dict[str, List[Dict[str, Any]]]:
+        """Sample realistic call arguments from the loaded dataset"""
+        # Seeded hash order spreads the sample over rooms; by key it would fill from a few big groups
+        memberships = [{'room_id': room_id, 'user_id': user_id} for room_id, user_id in conn.execute(
+            'SELECT room_id, user_id FROM room_participants WHERE is_active '
+            'ORDER BY md5(room_id::text || user_id::text || %s), room_id, user_id LIMIT %s',
+            (str(self.seed), SAMPLE_SIZE))]
+        direct_pairs = [{'user1': user1, 'user2': user2} for user1, user2 in conn.execute(
+            """SELECT a.user_id, b.user_id
+               FROM rooms r
+               JOIN room_participants a ON a.room_id = r.id
+               JOIN room_participants b ON b.room_id = r.id AND a.user_id < b.user_id
+               WHERE r.type = 'direct'
+               ORDER BY r.id LIMIT %s""", (SAMPLE_SIZE,))]
+
+        user_ids = [row[0] for row in conn.execute('SELECT id FROM user_profiles ORDER BY id')]
+        rng = random.Random(self.seed)
+        user_batches = [{'user_ids': rng.sample(user_ids, min(PRESENCE_BATCH_SIZE, len(user_ids)))}
+                        for _ in range(min(SAMPLE_SIZE, len(user_ids)))]
+
+        # Search for words that actually occur, as a user searching their history would
+        words = self.search_terms
+        if not words:
+            words = sorted({word.lower() for (content,) in conn.execute(
+                                'SELECT content FROM messages ORDER BY id LIMIT %s', (SAMPLE_SIZE,))
+                            for word in re.findall(r'[A-Za-z]{4,}', content)})
+        searches = [{'user_id': m['user_id'], 'query': rng.choice(words)} for m in memberships] if words else []
+
+        # Ten minutes into started meetings, or the slot of upcoming ones
+        meeting_times = [{'at': at} for (at,) in conn.execute(
+            "SELECT coalesce(started_at + interval '10 minutes', scheduled_for) FROM meetings "
+            "WHERE scheduled_for IS NOT NULL ORDER BY id LIMIT %s", (SAMPLE_SIZE,))]
+
+        return {'memberships': memberships, 'direct_pairs': direct_pairs,
+                'user_batches': user_batches, 'searches': searches, 'meeting_times': meeting_times}
+
+    def _time_query(self, conn, query: str, pool: List[Dict[str, Any]], rng: random.Random) -> List[float]:
+        """Run warmup plus timed iterations with random pool parameters
+
+        Every call runs in a rolled-back transaction so writes such as
+        mark_room_messages_read leave the dataset unchanged between calls.
+        """
+        samples = []
+        for i in range(self.warmup + self.iterations):
+            params = rng.choice(pool)
+            with conn.transaction(force_rollback=True):
+                start = time.perf_counter()
+                conn.execute(query, params).fetchall()
+                elapsed = time.perf_counter() - start
+            if i >= self.warmup:
+                samples.append(elapsed)
+        return samples
+
+    def _explain(self, conn, query: str, params: Dict[str, Any]) -> Any:
+        with conn.transaction(force_rollback=True):
+            return conn.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}', params).fetchone()[0]
+
+    def _explain_function(self, conn, function: str, params: Dict[str, Any]) -> Optional[Any]:
+        """Explain a SQL helper's body with the call's arguments inlined
+
+        SECURITY DEFINER functions are never inlined, so the plan of the call
+        itself is just a Function Scan. The body is read from pg_proc so the
+        plan always reflects the migrated definition.
+        """
+        row = conn.execute(
+            """SELECT p.prosrc, p.proargnames, p.proargmodes
+               FROM pg_proc p JOIN pg_language l ON l.oid = p.prolang
+               WHERE p.proname = %s AND l.lanname = 'sql'""", (function,)).fetchone()
+        if row is None:
+            return None
+        body, names, modes = row
+        # Output columns of RETURNS TABLE share proargnames; only inputs are bound
+        inputs = [name for name, mode in zip(names, modes or ['i'] * len(names)) if mode in ('i', 'b')]
+
+        body = body.strip().rstrip(';')
+        for name, value in zip(inputs, params.values()):
+            literal = sql.Literal(value).as_string(conn)
+            if isinstance(value, list):
+                literal += '::uuid[]'
+            body = re.sub(rf'\b{re.escape(name)}\b', lambda _: literal, body)
+        with conn.transaction(force_rollback=True):
+            return conn.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {body}').fetchone()[0]
+
+
+def load_dataset(dsn: str, users: int, args: argparse.Namespace) -> float:
+    """Generate and load one scale with generate-test-data.py, returning seconds taken"""
+    command = [
+        sys.executable, GENERATOR,
+        '--users', str(users),
+        '--messages-per-room', str(args.messages_per_room),
+        '--topology', args.topology,
+        '--backend', args.backend,
+        '--seed', str(args.seed),
+        '--reference-time', args.reference_time,
+        '--workers', str(args.workers),
+        '--content', args.content,
+        '--meetings', str(max(1, round(users * args.meetings_per_user))),
+        '--load-dsn', dsn,
+        '--defer-triggers',
+    ]
+    for needle in args.needle:
+        command += ['--needle', needle]
+    start = time.perf_counter()
+    subprocess.run(command, check=True, stdout=None if args.verbose else subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark chat queries against generated datasets')
+    parser.add_argument('--dsn', type=str, required=True,
+                        help='Postgres connection string; seeded tables are replaced at every scale')
+    parser.add_argument('--scales', type=str, default='1000,10000',
+                        help='Comma-separated user counts to generate and benchmark')
+    parser.add_argument('--topology', choices=('classic', 'realistic'), default='realistic',
+                        help='Room topology passed to the generator')
+    parser.add_argument('--messages-per-room', type=int, default=15, help='Average messages per room')
+    parser.add_argument('--backend', choices=('python', 'numpy'), default='python',
+                        help='Message generation backend passed to the generator')
+    parser.add_argument('--workers', type=int, default=1, help='Generator worker processes')
+    parser.add_argument('--content', choices=('templates', 'corpus'), default='templates',
+                        help='Message text passed to the generator; corpus gives search realistic text')
+    parser.add_argument('--meetings-per-user', type=float, default=0.1,
+                        help='Meetings generated per user at each scale')
+    parser.add_argument('--needle', action='append', default=[], metavar='TERM:RATE',
+                        help='Generator needle (needs --content corpus); searches then use the needle terms')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for datasets and query parameters')
+    parser.add_argument('--reference-time', type=str, default='2025-01-01T00:00:00+00:00',
+                        help='Generator reference time, fixed so runs are comparable')
+    parser.add_argument('--iterations', type=int, default=200, help='Timed calls per query and scale')
+    parser.add_argument('--warmup', type=int, default=10, help='Untimed calls per query before timing')
+    parser.add_argument('--no-explain', action='store_true', help='Skip EXPLAIN (ANALYZE, BUFFERS) snapshots')
+    parser.add_argument('--skip-load', action='store_true',
+                        help='Benchmark the data already in the database instead of generating scales')
+    parser.add_argument('--output', type=str, default='benchmark-results.json', help='Output JSON file')
+    parser.add_argument('--verbose', action='store_true', help='Show generator output')
+
+    args = parser.parse_args()
+    if psycopg is None:
+        parser.error("psycopg 3 is required: pip install 'psycopg[binary]'")
+    try:
+        scales = [int(scale) for scale in args.scales.split(',')]
+    except ValueError:
+        parser.error('--scales must be comma-separated integers')
+    if any(scale < 2 for scale in scales):
+        parser.error('every scale needs at least 2 users')
+    if args.iterations < 1:
+        parser.error('--iterations must be at least 1')
+    if args.warmup < 0:
+        parser.error('--warmup cannot be negative')
+    if args.meetings_per_user <= 0:
+        parser.error('--meetings-per-user must be positive')
+    if args.needle and args.content != 'corpus':
+        parser.error('--needle needs --content corpus')
+
+    print("🏁 Benchmarking chat queries...")
+    search_terms = [needle.rpartition(':')[0] for needle in args.needle] or None
+    benchmark = QueryBenchmark(args.dsn, iterations=args.iterations, warmup=args.warmup, seed=args.seed,
+                               search_terms=search_terms)
+    with psycopg.connect(args.dsn) as conn:
+        server_version = conn.execute('SHOW server_version').fetchone()[0]
+
+    results = []
+    for users in ([None] if args.skip_load else scales):
+        scale = {'users': users}
+        if users is not None:
+            print(f"📦 Loading {users} users ({args.topology})...")
+            scale['load_seconds'] = round(load_dataset(args.dsn, users, args), 3)
+        scale.update(benchmark.run(explain=not args.no_explain))
+        results.append(scale)
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'server_version': server_version,
+        'settings': {
+            'topology': args.topology,
+            'messages_per_room': args.messages_per_room,
+            'content': args.content,
+            'needles': args.needle,
+            'meetings_per_user': args.meetings_per_user,
+            'seed': args.seed,
+            'reference_time': args.reference_time,
+            'iterations': args.iterations,
+            'warmup': args.warmup,
+        },
+        'scales': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, default=str)
+
+    print(f"📊 Benchmark results saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+"""
+Storage Throughput Benchmark Script
+This script uploads and downloads the attachment objects made by
+generate-test-data.py --attachments-dir against an S3-compatible endpoint
+(MinIO, moto_server or Supabase Storage's S3 API) with concurrent workers,
+reporting MB/s and per-object latency as JSON.
+"""
+
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+import argparse
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config
+    from botocore.exceptions import BotoCoreError, ClientError
+except ImportError:  # Reported by main()
+    boto3 = None
+
+MANIFEST_NAME = 'attachments.jsonl'
+
+# Bytes read per call when draining a download; bodies are discarded, not stored
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Object size classes reported separately, as (label, upper bound in bytes)
+SIZE_CLASSES = (('<100KB', 100 * 1024), ('100KB-1MB', 1024 * 1024), ('1-10MB', 10 * 1024 * 1024),
+                ('>10MB', float('inf')))
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    """Summarize latencies in seconds as millisecond statistics"""
+    ms = sorted(s * 1000 for s in samples)
+    cuts = statistics.quantiles(ms, n=100, method='inclusive') if len(ms) > 1 else ms * 99
+    return {
+        'mean_ms': round(statistics.fmean(ms), 4),
+        'p50_ms': round(cuts[49], 4),
+        'p95_ms': round(cuts[94], 4),
+        'p99_ms': round(cuts[98], 4),
+        'max_ms': round(ms[-1], 4),
+    }
+
+
+def read_manifest(directory: str, limit: int = 0) -> List[Dict[str, Any]]:
+    """Attachment records from the generator's attachments.jsonl"""
+    objects = []
+    with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry['entity'] == 'attachments':
+                objects.append(entry['record'])
+                if len(objects) == limit:
+                    break
+    return objects
+
+
+class StorageBenchmark:
+    """Times concurrent uploads and downloads of attachment objects"""
+
+    def __init__(self, endpoint_url: str, concurrency: int = 16, region: str = 'us-east-1',
+                 access_key: Optional[str] = None, secret_key: Optional[str] = None,
+                 multipart_threshold: int = 8 * 1024 * 1024):
+        self.concurrency = concurrency
+        # One client is shared by all workers; botocore clients are thread-safe
+        self.client = boto3.client(
+            's3', endpoint_url=endpoint_url, region_name=region, aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            config=Config(max_pool_connections=concurrency, s3={'addressing_style': 'path'}))
+        # Parallelism comes from concurrent objects, so each transfer stays on its worker thread
+        self.transfer_config = TransferConfig(multipart_threshold=multipart_threshold,
+                                              multipart_chunksize=multipart_threshold, use_threads=False)
+
+    def ensure_buckets(self, objects: List[Dict[str, Any]]):
+        existing = {bucket['Name'] for bucket in self.client.list_buckets().get('Buckets', [])}
+        for bucket in sorted({o['bucket'] for o in objects} - existing):
+            self.client.create_bucket(Bucket=bucket)
+            print(f"🪣 Created bucket {bucket}")
+
+    def run(self, directory: str, objects: List[Dict[str, Any]], download: bool = True,
+            delete: bool = False) -> Dict[str, Any]:
+        """Upload, then optionally download and delete, every object; returns per-phase stats"""
+        results = {'upload': self._phase('upload', objects, lambda o: self._upload(directory, o))}
+        if download:
+            results['download'] = self._phase('download', objects, self._download)
+        if delete:
+            for o in objects:
+                self.client.delete_object(Bucket=o['bucket'], Key=o['key'])
+        return results
+
+    def _phase(self, name: str, objects: List[Dict[str, Any]], transfer) -> Dict[str, Any]:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            outcomes = list(pool.map(transfer, objects))
+        elapsed = time.perf_counter() - start
+
+        timed = [(o, seconds) for o, seconds in zip(objects, outcomes) if seconds is not None]
+        moved = sum(o['size'] for o, _seconds in timed)
+        stats = {
+            'objects': len(timed),
+            'errors': len(objects) - len(timed),
+            'bytes': moved,
+            'seconds': round(elapsed, 4),
+            'mb_per_sec': round(moved / elapsed / 1e6, 3) if elapsed else 0.0,
+            'objects_per_sec': round(len(timed) / elapsed, 3) if elapsed else 0.0,
+        }
+        if timed:
+            stats.update(_percentiles([seconds for _o, seconds in timed]))
+        stats['size_classes'] = {}
+        lower = 0
+        for label, upper in SIZE_CLASSES:
+            samples = [(o['size'], seconds) for o, seconds in timed if lower <= o['size'] < upper]
+            lower = upper
+            if samples:
+                class_bytes = sum(size for size, _seconds in samples)
+                stats['size_classes'][label] = {
+                    'objects': len(samples),
+                    # Per-object throughput, unaffected by how many transfers overlap
+                    'object_mb_per_sec': round(class_bytes / sum(s for _size, s in samples) / 1e6, 3),
+                    **_percentiles([seconds for _size, seconds in samples]),
+                }
+        stats['per_object'] = [{'key': o['key'], 'size': o['size'], 'seconds': round(seconds, 6)}
+                               for o, seconds in timed]
+
+        line = (f"⏱️ {name}: {stats['objects']} objects, {moved / 1e6:,.1f} MB in {elapsed:.2f}s "
+                f"({stats['mb_per_sec']:,.1f} MB/s)")
+        if timed:
+            line += f", p50 {stats['p50_ms']:.1f}ms, p95 {stats['p95_ms']:.1f}ms, p99 {stats['p99_ms']:.1f}ms"
+        print(f"{line}, {stats['errors']} errors")
+        return stats
+
+    def _upload(self, directory: str, o: Dict[str, Any]) -> Optional[float]:
+        start = time.perf_counter()
+        try:
+            self.client.upload_file(os.path.join(directory, o['path']), o['bucket'], o['key'],
+                                    ExtraArgs={'ContentType': o['content_type']}, Config=self.transfer_config)
+        except (BotoCoreError, ClientError) as e:
+            print(f"⚠️ upload {o['key']}: {e}")
+            return None
+        return time.perf_counter() - start
+
+    def _download(self, o: Dict[str, Any]) -> Optional[float]:
+        start = time.perf_counter()
+        try:
+            body = self.client.get_object(Bucket=o['bucket'], Key=o['key'])['Body']
+            received = 0
+            for chunk in body.iter_chunks(DOWNLOAD_CHUNK_BYTES):
+                received += len(chunk)
+        except (BotoCoreError, ClientError) as e:
+            print(f"⚠️ download {o['key']}: {e}")
+            return None
+        if received != o['size']:
+            print(f"⚠️ download {o['key']}: {received} bytes, expected {o['size']}")
+            return None
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark attachment uploads and downloads against S3 storage')
+    parser.add_argument('--attachments-dir', type=str, required=True,
+                        help='Directory written by generate-test-data.py --attachments-dir')
+    parser.add_argument('--endpoint-url', type=str, default='http://localhost:9000',
+                        help='S3-compatible endpoint, e.g. MinIO or moto_server')
+    parser.add_argument('--region', type=str, default='us-east-1', help='Region sent with signed requests')
+    parser.add_argument('--access-key', type=str, help='Access key (defaults to the usual AWS environment)')
+    parser.add_argument('--secret-key', type=str, help='Secret key (defaults to the usual AWS environment)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Objects transferred at once')
+    parser.add_argument('--multipart-mb', type=float, default=8.0,
+                        help='Objects above this size are uploaded in multipart chunks of this size')
+    parser.add_argument('--limit', type=int, default=0, help='Only use the first N objects (0 for all)')
+    parser.add_argument('--create-buckets', action='store_true', help='Create missing buckets first')
+    parser.add_argument('--skip-download', action='store_true', help='Only time uploads')
+    parser.add_argument('--delete', action='store_true', help='Delete the uploaded objects afterwards')
+    parser.add_argument('--output', type=str, default='storage-benchmark-results.json', help='Output JSON file')
+
+    args = parser.parse_args()
+    if boto3 is None:
+        parser.error('boto3 is required: pip install boto3')
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    if args.multipart_mb <= 0:
+        parser.error('--multipart-mb must be positive')
+    if args.limit < 0:
+        parser.error('--limit cannot be negative')
+    try:
+        objects = read_manifest(args.attachments_dir, args.limit)
+    except OSError as e:
+        parser.error(f'--attachments-dir: {e}')
+    if not objects:
+        parser.error(f'no attachments listed in {os.path.join(args.attachments_dir, MANIFEST_NAME)}')
+
+    total = sum(o['size'] for o in objects)
+    print(f"🏁 Benchmarking {len(objects)} objects ({total / 1e6:,.1f} MB) against {args.endpoint_url}...")
+    benchmark = StorageBenchmark(args.endpoint_url, concurrency=args.concurrency, region=args.region,
+                                 access_key=args.access_key, secret_key=args.secret_key,
+                                 multipart_threshold=int(args.multipart_mb * 1024 * 1024))
+    if args.create_buckets:
+        benchmark.ensure_buckets(objects)
+    results = benchmark.run(args.attachments_dir, objects, download=not args.skip_download, delete=args.delete)
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'settings': {
+            'endpoint_url': args.endpoint_url,
+            'concurrency': args.concurrency,
+            'multipart_mb': args.multipart_mb,
+            'objects': len(objects),
+            'bytes': total,
+        },
+        'phases': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"📊 Benchmark results saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -6,19 +6,851 @@ This script generates realistic test data for the WhatsApp Clone project
 with various scenarios and edge cases for comprehensive testing.
 """
 
+import hashlib
+import heapq
 import json
+import math
+import mmap
+import multiprocessing
+import os
+import pickle
 import random
-import uuid
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+import shutil
+import sys
+import queue
+import tempfile
+import time
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import argparse
+import asyncio
+import bisect
+import cProfile
+import gzip
+from contextlib import contextmanager
+
+try:
+    import numpy as np
+except ImportError:  # Only needed for --backend numpy
+    np = None
+
+try:
+    import psycopg
+except ImportError:  # Only needed for --load-dsn
+    psycopg = None
+
+try:
+    import zstandard
+except ImportError:  # Only needed for --compress zstd
+    zstandard = None
+
+try:
+    import resource
+except ImportError:  # Not on Windows; peak RSS is then left out of phase stats
+    resource = None
+
+# Number of SQL statements buffered before each write in streaming mode
+SQL_WRITE_CHUNK = 5000
+
+# Characters buffered before each write, for pieces such as a shard's COPY text
+SQL_WRITE_BYTES = 1 << 20
+
+# Rows per pickled block when spooling a table to disk
+SPOOL_BLOCK_SIZE = 10000
+
+# Rooms per deterministic generation shard. Fixed, so output never depends on --workers
+ROOM_SHARD_SIZE = 256
+
+# Room topologies: the original fixed handful of rooms, or rooms scaled to the user count
+ROOM_TOPOLOGIES = ('classic', 'realistic')
+
+# Heavy-tail shapes for the realistic topology. Pareto alpha 1.6 with a 3-member
+# floor puts roughly one group in 10k above 1,000 members
+GROUP_SIZE_ALPHA = 1.6
+MIN_GROUP_SIZE = 3
+MESSAGE_VOLUME_ALPHA = 1.5
+# Zipf exponent for how many rooms each user joins, by user rank
+USER_POPULARITY_EXPONENT = 0.8
+
+# Message generation backends: per-row Python, or whole NumPy columns per shard
+GENERATION_BACKENDS = ('python', 'numpy')
+
+# Mean Poisson reactions per message in the numpy backend; matches the python
+# backend's 30% chance of 1-3 reactors
+REACTIONS_PER_MESSAGE = 0.6
+
+# Message content: the fixed templates, or a TextCorpus of Zipf-distributed words
+CONTENT_MODES = ('templates', 'corpus')
+
+# Corpus languages: share of users writing in it, its most common words in
+# rank order, and syllables the rest of its vocabulary is built from
+CORPUS_LANGUAGES = {
+    'en': (0.6, ('the', 'i', 'to', 'you', 'a', 'and', 'it', 'is', 'that', 'in', 'for', 'we', 'of', 'on', 'this',
+                 'be', 'have', 'with', 'so', 'can', 'just', 'at', 'do', 'me', 'not', 'will', 'are', 'what', 'my',
+                 'was', 'ok', 'yes', 'no', 'thanks', 'today', 'meeting', 'call', 'tomorrow', 'lunch', 'code'),
+           ('ka', 'ro', 'ten', 'mi', 'sha', 'bel', 'dor', 'lin', 'ver', 'pa', 'sto', 'gri', 'un', 'ex', 'tra',
+            'mon', 'fi', 'le', 'ar', 'co', 'ing', 'tion', 'ple', 'ment', 'ly', 'er', 'bro', 'quin', 'sel', 'wa')),
+    'es': (0.15, ('que', 'de', 'no', 'la', 'el', 'y', 'en', 'lo', 'es', 'un', 'por', 'me', 'se', 'con', 'para',
+                  'una', 'los', 'mi', 'pero', 'si', 'hola', 'gracias', 'bien', 'hoy', 'mañana'),
+           ('ra', 'te', 'mo', 'cia', 'ble', 'dar', 'ne', 'lu', 'ga', 'so', 'pe', 'tri', 'ma', 'ci', 'do', 'ven',
+            'al', 'es', 'ri', 'co', 'ción', 'ño', 'mien', 'to', 'que')),
+    'de': (0.1, ('ich', 'die', 'und', 'das', 'ist', 'nicht', 'du', 'es', 'wir', 'ein', 'zu', 'mit', 'den', 'auf',
+                 'ja', 'der', 'so', 'auch', 'noch', 'mal', 'danke', 'heute', 'morgen', 'gut', 'für'),
+           ('sch', 'ein', 'ber', 'ung', 'lich', 'ge', 'ver', 'zeit', 'kraft', 'stadt', 'wer', 'ke', 'tag', 'hau',
+            'ste', 'ring', 'feld', 'bach', 'mann', 'heit', 'ü', 'ä', 'ö', 'ß', 'keit')),
+    'ru': (0.15, ('и', 'в', 'не', 'я', 'что', 'на', 'ты', 'это', 'с', 'да', 'как', 'а', 'мы', 'так', 'все', 'но',
+                  'по', 'у', 'он', 'вот', 'привет', 'спасибо', 'сегодня', 'завтра', 'хорошо'),
+           ('ра', 'то', 'ви', 'ка', 'но', 'ст', 'ль', 'ми', 'ва', 'да', 'ко', 'пе', 'ло', 'ре', 'сти', 'мо', 'ну',
+            'жа', 'бы', 'за', 'ский', 'ние', 'ый', 'ть', 'ов')),
+}
+# Zipf exponent for word frequency by rank within a language
+CORPUS_ZIPF_EXPONENT = 1.05
+# Words per message are log-normal: median 7, about 1% above 70 words
+CORPUS_MEDIAN_WORDS = 7
+CORPUS_WORDS_SIGMA = 1.0
+CORPUS_MAX_WORDS = 500
+# Share of messages ending in 1-3 emoji, and of messages that are only emoji
+CORPUS_EMOJI_RATE = 0.15
+CORPUS_EMOJI_ONLY_RATE = 0.03
+CORPUS_EMOJIS = ('👍', '❤️', '😊', '🎉', '💪', '☕', '🚀', '✅', '🔥', '💯', '😂', '🙏', '😅', '🤔', '👀', '😍',
+                 '🥳', '😢', '👏', '🙌')
+
+# Attachment objects for image/file/audio messages: bucket (as in
+# SUPABASE_STORAGE_SETUP.md), content type, extension and median size.
+# Sizes are log-normal and capped at the bucket's file size limit
+ATTACHMENT_TYPES = {
+    'image': ('chat-media', 'image/jpeg', 'jpg', 200 * 1024),
+    'file': ('message-attachments', 'application/pdf', 'pdf', 500 * 1024),
+    'audio': ('chat-media', 'audio/mpeg', 'mp3', 300 * 1024),
+}
+ATTACHMENT_BUCKET_LIMITS = {'chat-media': 100 * 1024 * 1024, 'message-attachments': 50 * 1024 * 1024}
+ATTACHMENT_SIZE_SIGMA = 1.2
+ATTACHMENT_MIN_BYTES = 1024
+# How object bodies are written: sparse files (holes, no disk or RAM), or a
+# seeded pseudo-random block repeated through a memory map
+ATTACHMENT_FILLS = ('sparse', 'pattern')
+ATTACHMENT_PATTERN_BYTES = 64 * 1024
+
+# Meetings per deterministic generation shard. Fixed, so output never depends on --workers
+MEETING_SHARD_SIZE = 1024
+# Meeting lifecycle: started meetings open up to 4 minutes after their slot,
+# invite 1 + Exp(4) guests and see 80% of them join. Most join within the
+# first minute or two and stay to the end, so concurrency peaks early and
+# holds; the rest arrive at any point, and some leave before the end
+MEETING_START_DELAY_SECONDS = 240
+MEETING_MEAN_GUESTS = 4.0
+MEETING_ATTENDANCE = 0.8
+MEETING_JOIN_SPREAD_SECONDS = 90.0
+MEETING_LATE_JOIN_RATE = 0.15
+MEETING_EARLY_LEAVE_RATE = 0.2
+MEETING_END_JITTER_SECONDS = 30
+# add_host_as_participant_trigger joins the host at the meeting's created_at
+# and never sets left_at. Align host rows with the meeting window: completed
+# meetings end when their host leaves, and nobody has joined one not yet started
+MEETING_HOST_SQL = (
+    "UPDATE meeting_participants AS p SET left_at = m.ended_at FROM meetings AS m "
+    "WHERE p.meeting_id = m.id AND p.role = 'host' AND p.left_at IS NULL AND m.ended_at IS NOT NULL",
+    "UPDATE meeting_participants AS p SET joined_at = NULL FROM meetings AS m "
+    "WHERE p.meeting_id = m.id AND p.role = 'host' AND p.joined_at IS NOT NULL AND m.started_at IS NULL",
+)
+
+# Compression for --output-dir chunks, with file extensions
+COMPRESSIONS = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+# Uncompressed bytes after which an --output-dir chunk file is closed
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+# Output formats understood by generate_sql/write_sql
+SQL_FORMATS = ('insert', 'batch', 'copy')
+
+# Default rows per multi-row INSERT in batch format
+DEFAULT_BATCH_SIZE = 500
+
+# Seeded columns per table, in foreign-key load order
+TABLE_COLUMNS = {
+    'auth.users': ('id', 'email'),
+    'user_profiles': ('id', 'display_name', 'avatar_url', 'phone_number', 'status_message', 'is_online', 'last_seen'),
+    'rooms': ('id', 'name', 'description', 'type', 'created_by', 'avatar_url', 'last_message_at', 'created_at'),
+    'room_participants': ('room_id', 'user_id', 'role', 'joined_at', 'is_active'),
+    'messages': ('id', 'room_id', 'user_id', 'content', 'type', 'reply_to', 'created_at', 'edited_at', 'deleted_at'),
+    'message_reactions': ('message_id', 'user_id', 'emoji', 'created_at'),
+    'message_status': ('message_id', 'user_id', 'status', 'timestamp'),
+    'meetings': ('id', 'room_id', 'livekit_room_name', 'host_id', 'title', 'description', 'scheduled_for',
+                 'started_at', 'ended_at', 'max_participants', 'recording_url', 'created_at'),
+    'meeting_participants': ('meeting_id', 'user_id', 'role', 'joined_at', 'left_at', 'is_audio_enabled',
+                             'is_video_enabled', 'connection_quality'),
+}
+
+# Tables in foreign-key order; tables in one stage load concurrently. Messages
+# wait for room_participants because create_message_status reads it per insert
+LOAD_STAGES = (
+    ('auth.users',),
+    ('user_profiles',),
+    ('rooms',),
+    ('room_participants', 'meetings'),
+    ('messages', 'meeting_participants'),
+    ('message_reactions', 'message_status'),
+)
+
+# Per-row message triggers that bulk loads can switch off and replay themselves
+DEFERRED_MESSAGE_TRIGGERS = ('create_message_status_trigger', 'update_room_last_message_trigger')
+
+# Methods the direct loader can use
+LOAD_METHODS = ('copy', 'batch')
+
+# Tables cleared before seeding, children first
+CLEARED_TABLES = (
+    'message_reactions', 'message_status', 'messages', 'typing_indicators', 'user_presence',
+    'room_participants', 'rooms', 'meeting_recordings', 'meeting_invitations',
+    'meeting_participants', 'meetings', 'user_profiles'
+)
+
+# Every foreign key to a user points at auth.users, so generated users get an
+# account there too. Its email is on this domain, so clearing removes only them
+SEEDED_EMAIL_DOMAIN = 'seed.whatsapp-clone.test'
+CLEAR_SEEDED_USERS_SQL = f"DELETE FROM auth.users WHERE email LIKE '%@{SEEDED_EMAIL_DOMAIN}'"
+
+# Tables loaded with session_replication_role = replica, so user triggers stay
+# off: on_auth_user_created would insert the user_profiles rows loaded next
+TRIGGERLESS_TABLES = ('auth.users',)
+
+# Statements issued by simulated clients in --simulate mode
+SIMULATED_ACTIONS = ('message', 'typing', 'presence', 'read')
+
+SIMULATE_MESSAGE_SQL = "INSERT INTO messages (room_id, user_id, content, type) VALUES (%s, %s, %s, 'text')"
+SIMULATE_TYPING_SQL = (
+    "INSERT INTO typing_indicators (room_id, user_id, is_typing, updated_at) VALUES (%s, %s, %s, now()) "
+    "ON CONFLICT (room_id, user_id) DO UPDATE SET is_typing = EXCLUDED.is_typing, updated_at = now()"
+)
+SIMULATE_PRESENCE_SQL = (
+    "INSERT INTO user_presence (user_id, is_online, last_seen, status) VALUES (%s, %s, now(), %s) "
+    "ON CONFLICT (user_id) DO UPDATE SET is_online = EXCLUDED.is_online, last_seen = now(), "
+    "status = EXCLUDED.status, updated_at = now()"
+)
+SIMULATE_READ_SQL = "SELECT mark_room_messages_read(%s, %s)"
+
+# Events of the --churn workload, replayed with the SQL the app and helper functions use
+CHURN_EVENTS = ('typing_start', 'typing_stop', 'online', 'offline', 'cleanup')
+CHURN_OFFLINE_SQL = "SELECT update_user_offline_presence(%s)"
+CHURN_CLEANUP_SQL = "SELECT cleanup_typing_indicators()"
+CHURN_TABLES = ('typing_indicators', 'user_presence')
+# Tables come back as their 1-based position in the parameter array: relname is
+# a name, which a SQL_ASCII database returns as bytes rather than str
+CHURN_TABLE_STATS_SQL = (
+    "SELECT array_position(%(tables)s::text[], relname::text), pg_relation_size(relid), "
+    "pg_indexes_size(relid), n_live_tup, n_dead_tup, n_tup_upd, n_tup_hot_upd, autovacuum_count "
+    "FROM pg_stat_user_tables WHERE schemaname = 'public' AND relname::text = ANY(%(tables)s::text[])"
+)
+
+# Churn events are generated window by window; each window and user shard has
+# its own random stream, so the stream is deterministic and memory stays flat
+CHURN_WINDOW_SECONDS = 60
+
+# Typing bursts last this many seconds; this share is never stopped and is
+# left for cleanup_typing_indicators, like a closed tab
+CHURN_TYPING_SECONDS = (1.0, 8.0)
+CHURN_ABANDONED_TYPING = 0.15
+
+# Bumped whenever the --state snapshot layout changes
+STATE_VERSION = 1
+
+# Tables that hold the base dataset; append runs reuse them and emit only the rest
+BASE_TABLES = ('auth.users', 'user_profiles', 'rooms', 'room_participants')
+
+# Characters that must be escaped in COPY text format
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _derive_seed(*parts: Any) -> int:
+    """Derive a stable 64-bit seed from a base seed and a stream name"""
+    digest = hashlib.sha256(':'.join(map(str, parts)).encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def _random_uuid_int(rng: random.Random) -> int:
+    """Draw a version 4 UUID from rng as its 128-bit integer"""
+    value = rng.getrandbits(128)
+    # RFC 4122 variant and version 4, as uuid.UUID(int=..., version=4) sets them
+    value = (value & ~(0xc000 << 48)) | 0x8000 << 48
+    return (value & ~(0xf000 << 64)) | 4 << 76
+
+
+def _format_uuid(value: int) -> str:
+    digits = '%032x' % value
+    return f'{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}'
+
+
+def _random_uuid(rng: random.Random) -> str:
+    """Draw a version 4 UUID from rng instead of os.urandom"""
+    return _format_uuid(_random_uuid_int(rng))
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _wall_us(value: datetime) -> int:
+    """Wall-clock microseconds since the epoch, ignoring any timezone"""
+    return (value.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_wall_us(value: int, tz: Optional[Any]) -> datetime:
+    """Invert _wall_us, reattaching tz"""
+    return (_EPOCH + timedelta(microseconds=value)).replace(tzinfo=tz)
+
+
+def _to_epoch_us(value: datetime) -> int:
+    """Microseconds since the Unix epoch; aware values are converted to UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _sql_literal(value: Any) -> str:
+    """Render a Python value as a SQL literal"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, datetime):
+        return f"'{value.isoformat()}'"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _copy_field(value: Any) -> str:
+    """Render a Python value as a COPY text-format field"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def _insert_statements(table: str, columns: Tuple[str, ...], rows: Iterable[tuple]) -> Iterator[str]:
+    """Yield one INSERT statement per row"""
+    prefix = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ("
+    for row in rows:
+        yield prefix + ', '.join(map(_sql_literal, row)) + ');'
+
+
+def _batched_insert_statements(table: str, columns: Tuple[str, ...], rows: Iterable[tuple],
+                               batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+    """Yield multi-row INSERT statements holding up to batch_size rows each"""
+    prefix = f"INSERT INTO {table} ({', '.join(columns)}) VALUES\n"
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        yield prefix + ',\n'.join('(' + ', '.join(map(_sql_literal, row)) + ')' for row in batch) + ';'
+
+
+def _room_last_message_updates(items: Iterable[Tuple[str, datetime]],
+                               batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+    """Yield UPDATE ... FROM (VALUES ...) statements setting rooms.last_message_at"""
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            break
+        values = ',\n'.join(f"({_sql_literal(room_id)}::uuid, {_sql_literal(last)}::timestamptz)"
+                            for room_id, last in batch)
+        yield (f"UPDATE rooms AS r SET last_message_at = v.last_message_at FROM (VALUES\n{values}\n) "
+               f"AS v(id, last_message_at) WHERE r.id = v.id;")
+
+
+def _copy_block(table: str, columns: Tuple[str, ...], rows: Iterable[tuple]) -> Iterator[str]:
+    """Yield a COPY ... FROM STDIN block with one tab-separated line per row"""
+    yield f"COPY {table} ({', '.join(columns)}) FROM STDIN;"
+    for block in _row_blocks(rows):
+        if isinstance(block, _CopyRows):
+            if block:
+                yield block.copy_text
+            continue
+        for row in block:
+            yield '\t'.join(map(_copy_field, row))
+    yield '\\.'
+
+
+def _latency_stats(samples: List[float]) -> Dict[str, float]:
+    """Summarize latencies in seconds as p50/p95/p99/max milliseconds"""
+    if not samples:
+        return {'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    ms = sorted(sample * 1000 for sample in samples)
+    pick = lambda q: ms[min(len(ms) - 1, int(q * len(ms)))]
+    return {'p50_ms': pick(0.50), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99), 'max_ms': ms[-1]}
+
+
+class MessageRecord(Mapping):
+    """A generated message stored compactly, readable like the dict it replaces
+    
+    ``record['created_at']`` and the other MESSAGE_KEYS work as before, but
+    the id and reply_to are held as 128-bit integers and timestamps as
+    wall-clock epoch microseconds, formatted only when read or serialized.
+    Room and user ids are shared with the room, and reactions are kept as
+    (user_id, emoji) pairs. That takes under half the memory of a dict.
+    """
+    
+    __slots__ = ('_id', 'room_id', 'user_id', 'content', 'type', '_reply_to', '_created_at', '_reactions',
+                 '_edited_at', '_deleted_at', '_tz')
+    
+    def __init__(self, id: int, room_id: str, user_id: str, content: str, type: str, reply_to: Optional[int],
+                 created_at: int, reactions: tuple, edited_at: Optional[int], deleted_at: Optional[int],
+                 tz: Optional[Any] = None):
+        self._id = id
+        self.room_id = room_id
+        self.user_id = user_id
+        self.content = content
+        self.type = type
+        self._reply_to = reply_to
+        self._created_at = created_at
+        self._reactions = reactions
+        self._edited_at = edited_at
+        self._deleted_at = deleted_at
+        self._tz = tz
+    
+    def __reduce__(self):
+        return MessageRecord, (self._id, self.room_id, self.user_id, self.content, self.type, self._reply_to,
+                               self._created_at, self._reactions, self._edited_at, self._deleted_at, self._tz)
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in _MESSAGE_KEY_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(MESSAGE_KEYS)
+    
+    def __len__(self) -> int:
+        return len(MESSAGE_KEYS)
+    
+    def __repr__(self) -> str:
+        return f'MessageRecord({dict(self)!r})'
+    
+    @property
+    def id(self) -> str:
+        return _format_uuid(self._id)
+    
+    @property
+    def reply_to(self) -> Optional[str]:
+        return None if self._reply_to is None else _format_uuid(self._reply_to)
+    
+    @property
+    def created_at(self) -> datetime:
+        return _from_wall_us(self._created_at, self._tz)
+    
+    @property
+    def edited_at(self) -> Optional[datetime]:
+        return None if self._edited_at is None else _from_wall_us(self._edited_at, self._tz)
+    
+    @property
+    def deleted_at(self) -> Optional[datetime]:
+        return None if self._deleted_at is None else _from_wall_us(self._deleted_at, self._tz)
+    
+    @property
+    def reactions(self) -> List[Dict[str, str]]:
+        return [{'user_id': user_id, 'emoji': emoji} for user_id, emoji in self._reactions]
+    
+    def rows(self) -> Tuple[tuple, List[tuple]]:
+        """The messages row and message_reactions rows, ids and timestamps as strings"""
+        message_id = _format_uuid(self._id)
+        created_at = _from_wall_us(self._created_at, self._tz).isoformat()
+        row = (message_id, self.room_id, self.user_id, self.content, self.type,
+               None if self._reply_to is None else _format_uuid(self._reply_to), created_at,
+               None if self._edited_at is None else _from_wall_us(self._edited_at, self._tz).isoformat(),
+               None if self._deleted_at is None else _from_wall_us(self._deleted_at, self._tz).isoformat())
+        return row, [(message_id, user_id, emoji, created_at) for user_id, emoji in self._reactions]
+
+
+# Keys of a MessageRecord, in the order the message dicts had them
+MESSAGE_KEYS = ('id', 'room_id', 'user_id', 'content', 'type', 'reply_to', 'created_at', 'reactions',
+                'edited_at', 'deleted_at')
+_MESSAGE_KEY_SET = frozenset(MESSAGE_KEYS)
+
+
+def _message_rows(messages: Iterable[MessageRecord]) -> Tuple[List[tuple], List[tuple]]:
+    """Flatten message records into (message rows, reaction rows)"""
+    message_rows = []
+    reaction_rows = []
+    for m in messages:
+        row, reactions = m.rows()
+        message_rows.append(row)
+        reaction_rows.extend(reactions)
+    return message_rows, reaction_rows
+
+
+def _chunked_message_rows(messages: Iterable[MessageRecord],
+                          chunk_size: int = SPOOL_BLOCK_SIZE) -> Iterator[Tuple[List[tuple], List[tuple]]]:
+    """Flatten a message record stream into row shards of at least chunk_size messages
+    
+    Shards end only where the room changes, so like generated shards they
+    hold whole rooms and every reply shares a shard with its target.
+    """
+    chunk = []
+    for message in messages:
+        if len(chunk) >= chunk_size and message.room_id != chunk[-1].room_id:
+            yield _message_rows(chunk)
+            chunk = []
+        chunk.append(message)
+    if chunk:
+        yield _message_rows(chunk)
+
+
+def _sql_pieces(table: str, rows: Iterable[tuple], fmt: str,
+                batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Tuple[int, str]]:
+    """Yield (row count, SQL text) pieces that can be split between chunk files"""
+    columns = TABLE_COLUMNS[table]
+    if fmt == 'copy':
+        for block in _row_blocks(rows):
+            if isinstance(block, _CopyRows):
+                if block:
+                    yield len(block), block.copy_text
+                continue
+            for row in block:
+                yield 1, '\t'.join(map(_copy_field, row))
+    elif fmt == 'batch':
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            yield len(batch), next(_batched_insert_statements(table, columns, batch, batch_size))
+    else:
+        for statement in _insert_statements(table, columns, rows):
+            yield 1, statement
+
+
+class _SqlChunkWriter:
+    """Buffered, optionally compressed writer for one SQL chunk file"""
+    
+    def __init__(self, path: str, compression: str = 'none'):
+        self.path = path
+        if compression == 'gzip':
+            self._file = gzip.open(path, 'wb', compresslevel=6)
+        elif compression == 'zstd':
+            self._file = zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'))
+        else:
+            self._file = open(path, 'wb')
+        self._buffer = []
+        self._buffered = 0
+        self.rows = 0
+        self.uncompressed_bytes = 0
+    
+    def __enter__(self) -> '_SqlChunkWriter':
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def write(self, line: str, rows: int = 0):
+        data = (line + '\n').encode()
+        self._buffer.append(data)
+        self._buffered += len(data)
+        self.uncompressed_bytes += len(data)
+        self.rows += rows
+        if len(self._buffer) >= SQL_WRITE_CHUNK or self._buffered >= SQL_WRITE_BYTES:
+            self._file.write(b''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+    
+    def close(self, name: Optional[str] = None, table: Optional[str] = None) -> Dict[str, Any]:
+        """Flush and close, returning the chunk's manifest entry"""
+        if self._file is not None:
+            self._file.write(b''.join(self._buffer))
+            self._file.close()
+            self._file = None
+        return {'path': name, 'table': table, 'rows': self.rows, 'bytes': os.path.getsize(self.path),
+                'uncompressed_bytes': self.uncompressed_bytes}
+
+
+class _RowBlocks:
+    """Single-pass rows that arrive in blocks, such as message shards of whole rooms
+    
+    Iterating yields rows; ``blocks()`` yields the row lists themselves, so
+    writers can keep every block in one piece.
+    """
+    
+    def __init__(self, blocks: Iterable[List[tuple]]):
+        self._blocks = blocks
+    
+    def __iter__(self) -> Iterator[tuple]:
+        for block in self._blocks:
+            yield from block
+    
+    def blocks(self) -> Iterable[List[tuple]]:
+        return self._blocks
+
+
+class _CopyRows(list):
+    """Message or reaction rows that also carry their COPY text, built column-wise
+    
+    COPY writers emit ``copy_text`` whole instead of formatting each row;
+    everything else reads the row tuples as usual.
+    """
+    
+    def __init__(self, rows: Iterable[tuple], copy_text: str):
+        super().__init__(rows)
+        self.copy_text = copy_text
+
+
+def _room_runs(blocks: Iterable[List[tuple]], min_rows: int = 1) -> Iterator[List[tuple]]:
+    """Split blocks of message rows into runs of whole rooms, each of at least min_rows rows
+    
+    A room's rows are contiguous and never span blocks, so every run
+    boundary is a room boundary. Runs of a _CopyRows block keep their
+    slice of its COPY text.
+    """
+    for block in blocks:
+        lines = block.copy_text.split('\n') if isinstance(block, _CopyRows) else None
+        start = 0
+        for end in range(1, len(block) + 1):
+            if end == len(block) or (end - start >= min_rows and block[end][1] != block[end - 1][1]):
+                run = block[start:end]
+                yield run if lines is None else _CopyRows(run, '\n'.join(lines[start:end]))
+                start = end
+
+
+def _row_blocks(rows: Iterable[tuple]) -> Iterable[Iterable[tuple]]:
+    """The blocks of block-wise rows, or the rows as a single block"""
+    return rows.blocks() if isinstance(rows, (_RowBlocks, _RowSpool)) else (rows,)
+
+
+class _RowSpool:
+    """Append-only row buffer that spills to a temporary file in pickled blocks"""
+    
+    def __init__(self, block_size: int = SPOOL_BLOCK_SIZE):
+        self.block_size = block_size
+        self.count = 0
+        self._block = []
+        self._file = tempfile.TemporaryFile()
+    
+    def append(self, row: tuple):
+        self._block.append(row)
+        self.count += 1
+        if len(self._block) >= self.block_size:
+            pickle.dump(self._block, self._file, pickle.HIGHEST_PROTOCOL)
+            self._block = []
+    
+    def extend(self, rows: List[tuple]):
+        self.count += len(rows)
+        if isinstance(rows, _CopyRows):
+            # Spool preformatted rows as their own block so the COPY text survives
+            if self._block:
+                pickle.dump(self._block, self._file, pickle.HIGHEST_PROTOCOL)
+                self._block = []
+            pickle.dump(rows, self._file, pickle.HIGHEST_PROTOCOL)
+            return
+        self._block.extend(rows)
+        if len(self._block) >= self.block_size:
+            pickle.dump(self._block, self._file, pickle.HIGHEST_PROTOCOL)
+            self._block = []
+    
+    def __iter__(self) -> Iterator[tuple]:
+        for block in self.blocks():
+            yield from block
+    
+    def blocks(self) -> Iterator[List[tuple]]:
+        """Replay the spooled blocks once, then release the file"""
+        if self._block:
+            pickle.dump(self._block, self._file, pickle.HIGHEST_PROTOCOL)
+            self._block = []
+        self._file.seek(0)
+        try:
+            while True:
+                try:
+                    block = pickle.load(self._file)
+                except EOFError:
+                    break
+                yield block
+        finally:
+            self._file.close()
+
+
+class TextCorpus:
+    """Message text from a seeded multilingual vocabulary with Zipfian word frequencies
+    
+    Each language's vocabulary starts with its common words and is filled to
+    its share of ``vocabulary_size`` with words built from its syllables;
+    words are drawn by rank with weight 1/rank**``zipf_exponent``. Every user
+    writes in one language, picked from their id. Lengths are log-normal up
+    to CORPUS_MAX_WORDS, with emoji mixed in. Each ``needles`` (term, rate)
+    term is inserted as a word into that share of messages; no vocabulary
+    word contains a needle, so ``term in content`` finds exactly the messages
+    it was put in, as ILIKE does.
+    """
+    
+    def __init__(self, seed: int, vocabulary_size: int = 50000, zipf_exponent: float = CORPUS_ZIPF_EXPONENT,
+                 needles: Iterable[Tuple[str, float]] = ()):
+        self.needles = tuple(needles)
+        lowered = [needle.lower() for needle, _rate in self.needles]
+        rng = random.Random(_derive_seed(seed, 'vocabulary'))
+        self.languages = []
+        self.language_cum_weights = list(accumulate(share for share, _common, _syllables
+                                                    in CORPUS_LANGUAGES.values()))
+        
+        for share, common, syllables in CORPUS_LANGUAGES.values():
+            size = max(len(common), int(vocabulary_size * share))
+            words = dict.fromkeys(w for w in common if not any(n in w for n in lowered))
+            attempts = 0
+            while len(words) < size:
+                attempts += 1
+                if attempts > size * 20:
+                    raise ValueError(f"Cannot build {size} distinct words from {len(syllables)} syllables")
+                word = ''.join(rng.choices(syllables, k=rng.choice((1, 2, 2, 3, 3, 3, 4, 4, 5, 6))))
+                if not any(n in word for n in lowered):
+                    words.setdefault(word)
+            words = list(words)
+            cum_weights = list(accumulate(1 / rank ** zipf_exponent for rank in range(1, len(words) + 1)))
+            self.languages.append((words, cum_weights))
+        
+        self._arrays = None
+    
+    def __getstate__(self):
+        # NumPy views are rebuilt on demand after pickling into workers
+        return {**self.__dict__, '_arrays': None}
+    
+    def language_of(self, user_id: str) -> int:
+        return bisect.bisect(self.language_cum_weights,
+                             int(user_id[:8], 16) / 0x100000000 * self.language_cum_weights[-1])
+    
+    def sample(self, rng: random.Random, sender_id: str) -> str:
+        """One message body in the sender's language"""
+        if rng.random() < CORPUS_EMOJI_ONLY_RATE:
+            return ''.join(rng.choices(CORPUS_EMOJIS, k=rng.randint(1, 3)))
+        words, cum_weights = self.languages[self.language_of(sender_id)]
+        length = min(CORPUS_MAX_WORDS, max(1, int(rng.lognormvariate(math.log(CORPUS_MEDIAN_WORDS),
+                                                                      CORPUS_WORDS_SIGMA))))
+        chosen = rng.choices(words, cum_weights=cum_weights, k=length)
+        for needle, rate in self.needles:
+            if rng.random() < rate:
+                chosen.insert(rng.randint(0, len(chosen)), needle)
+        if rng.random() < CORPUS_EMOJI_RATE:
+            chosen.append(''.join(rng.choices(CORPUS_EMOJIS, k=rng.randint(1, 3))))
+        return ' '.join(chosen)
+    
+    def sample_columnar(self, rng: 'np.random.Generator', sender_ids: List[str]) -> List[str]:
+        """Message bodies for a whole shard, drawing every word of a language at once"""
+        if self._arrays is None:
+            self._arrays = [(np.array(words, dtype=object), np.array(cum_weights) / cum_weights[-1])
+                            for words, cum_weights in self.languages]
+        total = len(sender_ids)
+        lengths = np.clip(rng.lognormal(math.log(CORPUS_MEDIAN_WORDS), CORPUS_WORDS_SIGMA, total).astype(np.int64),
+                          1, CORPUS_MAX_WORDS)
+        languages = np.fromiter(map(self.language_of, sender_ids), dtype=np.int64, count=total)
+        messages = [None] * total
+        for language, (words, cdf) in enumerate(self._arrays):
+            members = np.flatnonzero(languages == language)
+            if not len(members):
+                continue
+            counts = lengths[members]
+            drawn = words[np.minimum(np.searchsorted(cdf, rng.random(int(counts.sum())), side='right'),
+                                     len(cdf) - 1)].tolist()
+            end = 0
+            for i, count in zip(members.tolist(), counts.tolist()):
+                messages[i] = drawn[end:end + count]
+                end += count
+        
+        for needle, rate in self.needles:
+            hits = np.flatnonzero(rng.random(total) < rate)
+            positions = (rng.random(len(hits)) * (lengths[hits] + 1)).astype(np.int64)
+            for i, position in zip(hits.tolist(), positions.tolist()):
+                messages[i].insert(position, needle)
+        
+        def emoji(count):
+            return ''.join(CORPUS_EMOJIS[e] for e in rng.integers(0, len(CORPUS_EMOJIS), count).tolist())
+        
+        for i in np.flatnonzero(rng.random(total) < CORPUS_EMOJI_RATE).tolist():
+            messages[i].append(emoji(int(rng.integers(1, 4))))
+        contents = [' '.join(words) for words in messages]
+        for i in np.flatnonzero(rng.random(total) < CORPUS_EMOJI_ONLY_RATE).tolist():
+            contents[i] = emoji(int(rng.integers(1, 4)))
+        return contents
+
+
+# Generator shared with pool workers, set once per process by _init_worker
+_worker_generator = None
+
+
+def _init_worker(generator: 'TestDataGenerator'):
+    global _worker_generator
+    _worker_generator = generator
+
+
+def _room_shard_worker(task: tuple) -> List[Dict[str, Any]]:
+    return _worker_generator._generate_room_shard(*task)
+
+
+def _meeting_shard_worker(task: tuple) -> List[Dict[str, Any]]:
+    return _worker_generator._generate_meeting_shard(*task)
+
+
+def _message_shard_worker(task: tuple) -> List[MessageRecord]:
+    return _worker_generator._generate_message_shard(*task)
+
+
+def _message_row_shard_worker(task: tuple) -> Tuple[List[tuple], List[tuple]]:
+    return _message_rows(_worker_generator._generate_message_shard(*task))
+
+
+def _columnar_message_shard_worker(task: tuple) -> Tuple[List[tuple], List[tuple]]:
+    return _worker_generator._generate_columnar_message_shard(*task)
+
 
 class TestDataGenerator:
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None, workers: int = 1, reference_time: Optional[datetime] = None,
+                 backend: str = 'python'):
+        if backend not in GENERATION_BACKENDS:
+            raise ValueError(f"Unknown generation backend: {backend}")
+        if backend == 'numpy' and np is None:
+            raise RuntimeError("The numpy backend needs NumPy: pip install numpy")
+        # Every random draw comes from a stream derived from this seed
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.base_seed = self.seed
+        # Appends made on top of the base dataset; each one draws from its own seed
+        self.epoch = 0
+        self.workers = max(1, workers)
+        self.backend = backend
+        self.topology = 'classic'
+        # Cumulative Zipf weights over users, built for the realistic topology
+        self.user_cum_weights = None
+        # Single anchor for relative timestamps so all shards agree on "now";
+        # pinning it together with the seed makes output byte-identical
+        self.reference_time = reference_time if reference_time is not None else datetime.now()
+        
         self.users = []
         self.rooms = []
         self.messages = []
         self.meetings = []
+        # Rooms meetings are drawn from, set by generate_meetings
+        self.meeting_rooms = []
+        self.message_count = 0
+        # Latest message per room, filled while messages stream
+        self.room_last_message_at = {}
+        # Rows per table from the last iter_table_rows pass, complete once its rows are consumed
+        self.table_rows = {}
+        # Set by from_state: only new rows are emitted, each room's messages
+        # following the instant recorded here
+        self.delta = False
+        self.resume_after = {}
+        # Snapshot's reference time; appended meetings fall between it and reference_time
+        self.resumed_from = None
+        # Snapshot's last message per room as ISO strings, carried into the next snapshot
+        self.resumed_last_message_at = {}
+        
+        # TextCorpus for message content; None keeps the templates
+        self.corpus = None
+        # Messages holding each corpus needle, counted as messages stream
+        self.needle_counts = {}
+        
+        # Mention lookup built once by generate_users
+        self.first_name_by_id = {}
         
         # Realistic names and data
         self.first_names = [
@@ -65,411 +897,1188 @@ class TestDataGenerator:
         
         self.emojis = ['👍', '❤️', '😊', '🎉', '💪', '☕', '🚀', '✅', '🔥', '💯']
         
+        self.group_names = [
+            'Development Team', 'Coffee Lovers ☕', 'Weekend Plans', 'Book Club 📚',
+            'Fitness Squad 💪', 'Movie Night 🎬', 'Travel Enthusiasts ✈️', 
+            'Tech Talk', 'Random Chat', 'Project Alpha', 'Daily Standup',
+            'Lunch Group', 'Gaming Squad 🎮', 'Music Lovers 🎵'
+        ]
+        
+        self.meeting_titles = [
+            'Daily Standup', 'Sprint Planning', 'Code Review', 'Team Retrospective',
+            'Coffee Chat', 'Project Kickoff', 'Client Meeting', 'Design Review',
+            'Architecture Discussion', 'Product Demo', 'Weekly Sync', 'All Hands'
+        ]
+    
+    def _rng(self, *stream: Any) -> random.Random:
+        """Independent RNG for a named stream such as ('messages', shard)"""
+        return random.Random(_derive_seed(self.seed, *stream))
+    
+    def _map_shards(self, worker, method, tasks: List[tuple]) -> Iterator[Any]:
+        """Run shard tasks in order, across a process pool when workers > 1
+        
+        At most two tasks per worker are in flight, so a slow consumer keeps
+        memory bounded instead of letting finished shards pile up. The pool
+        forks when this is called, not when results are first read: readers
+        such as PostgresLoader's threads hold locks and libpq sockets that a
+        fork from a threaded process would copy mid-use.
+        """
+        if self.workers == 1 or len(tasks) < 2:
+            return (method(*task) for task in tasks)
+        
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        pool = context.Pool(self.workers, initializer=_init_worker, initargs=(self,))
+        return self._pool_results(pool, worker, tasks)
+    
+    def _pool_results(self, pool, worker, tasks: List[tuple]) -> Iterator[Any]:
+        with pool:
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.apply_async(worker, (task,)))
+                if len(pending) >= self.workers * 2:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+        
+    @classmethod
+    def from_state(cls, path: str, workers: int = 1, reference_time: Optional[datetime] = None,
+                   backend: str = 'python') -> 'TestDataGenerator':
+        """Resume from a save_state snapshot to generate an insert-only delta
+        
+        Users and rooms come from the snapshot and are not emitted again; new
+        messages fall between each room's last message and ``reference_time``,
+        which must be later than the snapshot's. Each append gets a seed
+        derived from the base seed and its epoch, so ids never repeat.
+        """
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') != STATE_VERSION:
+            raise ValueError(f"Unsupported state snapshot version in {path}")
+        
+        previous = datetime.fromisoformat(state['reference_time'])
+        if reference_time is None:
+            reference_time = datetime.now(previous.tzinfo)
+        if (reference_time.tzinfo is None) != (previous.tzinfo is None):
+            raise ValueError(f"Reference time must be {'aware' if previous.tzinfo else 'naive'} "
+                             f"like the snapshot's ({previous.isoformat()})")
+        if reference_time <= previous:
+            raise ValueError(f"Reference time must be later than the snapshot's ({previous.isoformat()})")
+        
+        generator = cls(seed=state['seed'], workers=workers, reference_time=reference_time, backend=backend)
+        generator.epoch = state['epoch'] + 1
+        generator.seed = _derive_seed(generator.base_seed, 'append', generator.epoch)
+        generator.topology = state['topology']
+        generator.delta = True
+        generator.resumed_from = previous
+        
+        generator.users = [{'id': user_id, 'display_name': first_name} for user_id, first_name in state['users']]
+        generator.first_name_by_id = dict(state['users'])
+        generator.rooms = [
+            {'id': room_id, 'type': room_type, 'created_at': datetime.fromisoformat(created_at),
+             'participants': participants}
+            for room_id, room_type, created_at, participants in state['rooms']
+        ]
+        
+        # Strictly after both the previous run's "now" and the room's last message
+        last_message_at = state['room_last_message_at']
+        for room in generator.rooms:
+            last = last_message_at.get(room['id'])
+            start = max(previous, datetime.fromisoformat(last)) if last else previous
+            generator.resume_after[room['id']] = start + timedelta(microseconds=1)
+        generator.resumed_last_message_at = last_message_at
+        return generator
+    
+    def save_state(self, path: str):
+        """Snapshot what an append run needs to continue this dataset
+        
+        Call after the output has consumed the messages, so every room's last
+        message timestamp is known.
+        """
+        # New messages always follow the resumed ones, so this run's values win
+        last_message_at = dict(self.resumed_last_message_at)
+        last_message_at.update((room_id, value if isinstance(value, str) else value.isoformat())
+                               for room_id, value in self.room_last_message_at.items())
+        state = {
+            'version': STATE_VERSION,
+            'seed': self.base_seed,
+            'epoch': self.epoch,
+            'topology': self.topology,
+            'reference_time': self.reference_time.isoformat(),
+            'users': [[user['id'], self.first_name_by_id.get(user['id'], user['display_name'].split()[0])]
+                      for user in self.users],
+            'rooms': [[room['id'], room['type'], room['created_at'].isoformat(), room['participants']]
+                      for room in self.rooms],
+            'room_last_message_at': last_message_at,
+        }
+        partial = f'{path}.{os.getpid()}.tmp'
+        with gzip.open(partial, 'wt', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(partial, path)
+    
     def generate_users(self, count: int = 20) -> List[Dict[str, Any]]:
         """Generate realistic user data"""
+        rng = self._rng('users')
         users = []
         
         for i in range(count):
-            first_name = random.choice(self.first_names)
-            last_name = random.choice(self.last_names)
+            first_name = rng.choice(self.first_names)
+            last_name = rng.choice(self.last_names)
             
             user = {
-                'id': str(uuid.uuid4()),
+                'id': _random_uuid(rng),
                 'display_name': f'{first_name} {last_name}',
                 'email': f'{first_name.lower()}.{last_name.lower()}@example.com',
                 'avatar_url': f'https://i.pravatar.cc/150?u={first_name.lower()}',
-                'phone_number': f'+1{random.randint(2000000000, 9999999999)}',
-                'status_message': random.choice(self.status_messages),
-                'is_online': random.choice([True, False, False]),  # Bias towards offline
-                'last_seen': self._random_past_time(hours=random.randint(0, 72)),
-                'created_at': self._random_past_time(days=random.randint(1, 365))
+                'phone_number': f'+1{rng.randint(2000000000, 9999999999)}',
+                'status_message': rng.choice(self.status_messages),
+                'is_online': rng.choice([True, False, False]),  # Bias towards offline
+                'last_seen': self._random_past_time(rng, hours=rng.randint(0, 72)),
+                'created_at': self._random_past_time(rng, days=rng.randint(1, 365))
             }
             
             users.append(user)
         
         self.users = users
+        self.first_name_by_id = {u['id']: u['display_name'].split()[0] for u in users}
         return users
     
-    def generate_rooms(self, user_count: int = None) -> List[Dict[str, Any]]:
-        """Generate rooms with realistic participant distributions"""
+    def generate_rooms(self, user_count: int = None, topology: str = 'classic', rooms_per_user: float = 5.0,
+                       direct_ratio: float = 0.7, max_group_size: int = 5000) -> List[Dict[str, Any]]:
+        """Generate rooms with realistic participant distributions
+        
+        The ``classic`` topology keeps the original handful of rooms. The
+        ``realistic`` topology creates ``rooms_per_user`` rooms per user,
+        ``direct_ratio`` of them direct, with Pareto-distributed group sizes up
+        to ``max_group_size`` and Zipf-skewed membership, so a few users sit in
+        many rooms and a few groups have thousands of members.
+        """
         if not self.users:
             raise ValueError("Generate users first")
+        if topology not in ROOM_TOPOLOGIES:
+            raise ValueError(f"Unknown room topology: {topology}")
             
         if user_count is None:
             user_count = len(self.users)
-            
-        rooms = []
         
-        # Generate direct message rooms (50% of total rooms)
-        direct_room_count = min(user_count // 2, 10)
-        for i in range(direct_room_count):
-            user1, user2 = random.sample(self.users[:user_count], 2)
-            
-            room = {
-                'id': str(uuid.uuid4()),
-                'name': None,  # Direct rooms don't have names
-                'description': None,
-                'type': 'direct',
-                'created_by': user1['id'],
-                'participants': [user1['id'], user2['id']],
-                'avatar_url': None,
-                'last_message_at': self._random_past_time(hours=random.randint(0, 48)),
-                'created_at': self._random_past_time(days=random.randint(1, 30))
-            }
-            
-            rooms.append(room)
+        self.topology = topology
+        if topology == 'realistic':
+            total = max(1, round(user_count * rooms_per_user))
+            direct_room_count = round(total * direct_ratio)
+            # Cumulative weights let rng.choices bisect instead of scanning
+            weights = (1.0 / (rank + 1) ** USER_POPULARITY_EXPONENT for rank in range(user_count))
+            self.user_cum_weights = list(accumulate(weights))
+        else:
+            # Direct message rooms (50% of total rooms) come first, then group rooms
+            direct_room_count = min(user_count // 2, 10)
+            total = direct_room_count + min(len(self.group_names), 8)
         
-        # Generate group rooms
-        group_names = [
-            'Development Team', 'Coffee Lovers ☕', 'Weekend Plans', 'Book Club 📚',
-            'Fitness Squad 💪', 'Movie Night 🎬', 'Travel Enthusiasts ✈️', 
-            'Tech Talk', 'Random Chat', 'Project Alpha', 'Daily Standup',
-            'Lunch Group', 'Gaming Squad 🎮', 'Music Lovers 🎵'
+        tasks = [
+            (start, min(start + ROOM_SHARD_SIZE, total), direct_room_count, user_count, max_group_size)
+            for start in range(0, total, ROOM_SHARD_SIZE)
         ]
         
-        group_room_count = min(len(group_names), 8)
-        for i in range(group_room_count):
-            creator = random.choice(self.users[:user_count])
-            participant_count = random.randint(3, min(8, user_count))
-            participants = random.sample(self.users[:user_count], participant_count)
-            
-            room = {
-                'id': str(uuid.uuid4()),
-                'name': group_names[i],
-                'description': f'{group_names[i]} group chat',
-                'type': 'group',
-                'created_by': creator['id'],
-                'participants': [p['id'] for p in participants],
-                'avatar_url': f'https://i.pravatar.cc/150?u={group_names[i].lower().replace(" ", "")}',
-                'last_message_at': self._random_past_time(hours=random.randint(0, 24)),
-                'created_at': self._random_past_time(days=random.randint(1, 90))
-            }
+        rooms = []
+        for shard in self._map_shards(_room_shard_worker, self._generate_room_shard, tasks):
+            rooms.extend(shard)
+        
+        self.rooms = rooms
+        return rooms
+    
+    def _generate_room_shard(self, start: int, stop: int, direct_room_count: int, user_count: int,
+                             max_group_size: int = 5000) -> List[Dict[str, Any]]:
+        """Generate rooms start..stop from the shard's own RNG stream"""
+        rng = self._rng('rooms', start // ROOM_SHARD_SIZE)
+        if self.topology == 'realistic':
+            return [
+                self._generate_realistic_room(rng, i, i < direct_room_count, user_count, max_group_size)
+                for i in range(start, stop)
+            ]
+        
+        # Slice once; re-slicing per room copies the user list every time
+        user_pool = self.users[:user_count]
+        rooms = []
+        
+        for i in range(start, stop):
+            if i < direct_room_count:
+                user1, user2 = rng.sample(user_pool, 2)
+                
+                room = {
+                    'id': _random_uuid(rng),
+                    'name': None,  # Direct rooms don't have names
+                    'description': None,
+                    'type': 'direct',
+                    'created_by': user1['id'],
+                    'participants': [user1['id'], user2['id']],
+                    'avatar_url': None,
+                    'last_message_at': self._random_past_time(rng, hours=rng.randint(0, 48)),
+                    'created_at': self._random_past_time(rng, days=rng.randint(1, 30))
+                }
+            else:
+                name = self.group_names[i - direct_room_count]
+                creator = rng.choice(user_pool)
+                participant_count = rng.randint(3, min(8, user_count))
+                participants = rng.sample(user_pool, participant_count)
+                
+                room = {
+                    'id': _random_uuid(rng),
+                    'name': name,
+                    'description': f'{name} group chat',
+                    'type': 'group',
+                    'created_by': creator['id'],
+                    'participants': [p['id'] for p in participants],
+                    'avatar_url': f'https://i.pravatar.cc/150?u={name.lower().replace(" ", "")}',
+                    'last_message_at': self._random_past_time(rng, hours=rng.randint(0, 24)),
+                    'created_at': self._random_past_time(rng, days=rng.randint(1, 90))
+                }
             
             rooms.append(room)
         
-        self.rooms = rooms
         return rooms
     
-    def generate_messages(self, messages_per_room: int = 15) -> List[Dict[str, Any]]:
+    def _generate_realistic_room(self, rng: random.Random, index: int, direct: bool, user_count: int,
+                                 max_group_size: int) -> Dict[str, Any]:
+        """Generate one room of the realistic topology; the creator is always a member"""
+        if direct:
+            size = 2
+        else:
+            size = int(MIN_GROUP_SIZE * rng.paretovariate(GROUP_SIZE_ALPHA))
+            size = max(MIN_GROUP_SIZE, min(size, max_group_size, user_count))
+        participants = self._sample_members(rng, min(size, user_count), user_count)
+        
+        if direct:
+            name = description = avatar_url = None
+        else:
+            base_name = rng.choice(self.group_names)
+            name = f'{base_name} {index}'
+            description = f'{base_name} group chat'
+            avatar_url = f'https://i.pravatar.cc/150?u=room{index}'
+        
+        return {
+            'id': _random_uuid(rng),
+            'name': name,
+            'description': description,
+            'type': 'direct' if direct else 'group',
+            'created_by': participants[0],
+            'participants': participants,
+            'avatar_url': avatar_url,
+            'last_message_at': self._random_past_time(rng, hours=rng.randint(0, 24)),
+            'created_at': self._random_past_time(rng, days=rng.randint(1, 365))
+        }
+    
+    def _sample_members(self, rng: random.Random, size: int, user_count: int) -> List[str]:
+        """Draw size distinct user ids, weighted by Zipf popularity"""
+        users = self.users
+        if size * 4 > user_count:
+            # Dense rooms: rejection sampling would mostly redraw, sample uniformly
+            return [u['id'] for u in rng.sample(users[:user_count], size)]
+        
+        chosen = {}
+        cum_weights = self.user_cum_weights
+        population = range(user_count)
+        while len(chosen) < size:
+            for i in rng.choices(population, cum_weights=cum_weights, k=size - len(chosen)):
+                chosen.setdefault(i, None)
+        return [users[i]['id'] for i in islice(chosen, size)]
+    
+    def generate_messages(self, messages_per_room: int = 15) -> List[MessageRecord]:
         """Generate realistic message conversations"""
+        messages = list(self.iter_messages(messages_per_room))
+        self.messages = messages
+        return messages
+    
+    def iter_messages(self, messages_per_room: int = 15) -> Iterator[MessageRecord]:
+        """Yield messages shard by shard without keeping them all in memory
+        
+        Like iter_message_shards, the pool starts here, in the calling thread.
+        """
         if not self.rooms:
             raise ValueError("Generate rooms first")
             
+        self.message_count = 0
+        tasks = [(start, messages_per_room) for start in range(0, len(self.rooms), ROOM_SHARD_SIZE)]
+        return self._counted_messages(self._map_shards(_message_shard_worker, self._generate_message_shard, tasks))
+    
+    def _counted_messages(self, shards: Iterable[List[MessageRecord]]) -> Iterator[MessageRecord]:
+        for shard in shards:
+            self.message_count += len(shard)
+            yield from shard
+    
+    def iter_message_shards(self, messages_per_room: int = 15) -> Iterator[Tuple[List[tuple], List[tuple]]]:
+        """Yield (message rows, reaction rows) shard by shard for iter_table_rows
+        
+        Rows skip the message dicts entirely, and with workers the flattening
+        happens in the pool. The numpy backend builds each shard as columns.
+        The pool starts here, in the calling thread, rather than wherever the
+        shards are first read.
+        """
+        if not self.rooms:
+            raise ValueError("Generate rooms first")
+        
+        self.message_count = 0
+        tasks = [(start, messages_per_room) for start in range(0, len(self.rooms), ROOM_SHARD_SIZE)]
+        if self.backend == 'numpy':
+            shards = self._map_shards(_columnar_message_shard_worker, self._generate_columnar_message_shard, tasks)
+        else:
+            shards = self._map_shards(_message_row_shard_worker,
+                                      lambda *task: _message_rows(self._generate_message_shard(*task)),
+                                      tasks)
+        return self._counted_message_shards(shards)
+    
+    def _counted_message_shards(self, shards: Iterable[Tuple[List[tuple], List[tuple]]]
+                                ) -> Iterator[Tuple[List[tuple], List[tuple]]]:
+        for message_rows, reaction_rows in shards:
+            self.message_count += len(message_rows)
+            yield message_rows, reaction_rows
+    
+    def _generate_message_shard(self, start: int, messages_per_room: int) -> List[MessageRecord]:
+        """Generate conversations for the shard of rooms beginning at start"""
+        rng = self._rng('messages', start // ROOM_SHARD_SIZE)
         messages = []
+        tz = self.reference_time.tzinfo
+        minute_us = 60_000_000
+        # Mention contents repeat a lot; keep one string per distinct content
+        contents = {}
         
-        for room in self.rooms:
+        for room in self.rooms[start:start + ROOM_SHARD_SIZE]:
             room_messages = []
-            message_count = random.randint(5, messages_per_room)
             
-            # Create a conversation flow
-            conversation_start = self._random_past_time(hours=random.randint(1, 168))
-            current_time = conversation_start
+            if self.topology == 'realistic':
+                # Heavy-tailed volume averaging messages_per_room, busier in bigger
+                # groups, spread over the room's lifetime so nothing lands in the future
+                scale = messages_per_room * (MESSAGE_VOLUME_ALPHA - 1) / MESSAGE_VOLUME_ALPHA
+                message_count = max(1, int(scale * rng.paretovariate(MESSAGE_VOLUME_ALPHA)
+                                           * math.log2(len(room['participants']))))
+            else:
+                message_count = rng.randint(5, messages_per_room)
+            if self.delta:
+                # Rounded up with probability equal to the fraction, keeping the expected volume
+                message_count = int(message_count * self._append_share(room) + rng.random())
+            
+            if self.topology == 'realistic' or self.delta:
+                # Appends spread over the time since the room's last message
+                timeline_start = self.resume_after.get(room['id'], room['created_at'])
+                lifetime = max(0, int((self.reference_time - timeline_start).total_seconds()))
+                offsets = sorted(rng.randint(0, lifetime) for _ in range(message_count))
+                timeline_start = _wall_us(timeline_start)
+            else:
+                # Create a conversation flow
+                conversation_start = self._random_past_time(rng, hours=rng.randint(1, 168))
+                current_time = _wall_us(conversation_start)
             
             for i in range(message_count):
+                if self.topology == 'realistic' or self.delta:
+                    current_time = timeline_start + offsets[i] * 1_000_000
+                
                 # Select random participant as sender
-                sender_id = random.choice(room['participants'])
+                sender_id = rng.choice(room['participants'])
                 
                 # Generate content
-                content = self._generate_message_content(room, sender_id)
+                content = self._generate_message_content(rng, room, sender_id)
+                content = contents.setdefault(content, content)
                 
                 # Determine message type
-                message_type = self._determine_message_type()
+                message_type = self._determine_message_type(rng)
                 
                 # Reply to previous message sometimes
                 reply_to = None
-                if room_messages and random.random() < 0.3:  # 30% chance of reply
-                    reply_to = random.choice(room_messages)['id']
+                if room_messages and rng.random() < 0.3:  # 30% chance of reply
+                    reply_to = rng.choice(room_messages)
                 
-                message = {
-                    'id': str(uuid.uuid4()),
-                    'room_id': room['id'],
-                    'user_id': sender_id,
-                    'content': content,
-                    'type': message_type,
-                    'reply_to': reply_to,
-                    'created_at': current_time,
-                    'reactions': self._generate_reactions(room['participants']),
-                    'edited_at': None if random.random() > 0.1 else self._random_future_time(current_time, minutes=30),
-                    'deleted_at': None if random.random() > 0.05 else self._random_future_time(current_time, hours=1)
-                }
+                message_id = _random_uuid_int(rng)
+                reactions = self._generate_reactions(rng, room['participants'])
+                # Edited within 30 minutes, deleted within the hour
+                edited_at = None if rng.random() > 0.1 else current_time + rng.randint(0, 30) * minute_us
+                deleted_at = None if rng.random() > 0.05 else current_time + rng.randint(0, 60) * minute_us
                 
-                room_messages.append(message)
-                messages.append(message)
+                # Only ids are kept so replies can target earlier messages in the room
+                room_messages.append(message_id)
+                messages.append(MessageRecord(message_id, room['id'], sender_id, content, message_type, reply_to,
+                                              current_time, reactions, edited_at, deleted_at, tz))
                 
                 # Increment time for next message (realistic conversation timing)
-                current_time += timedelta(minutes=random.randint(1, 120))
+                if self.topology != 'realistic' and not self.delta:
+                    current_time += rng.randint(1, 120) * minute_us
         
-        self.messages = messages
         return messages
     
+    def _generate_columnar_message_shard(self, start: int, messages_per_room: int) -> Tuple[List[tuple], List[tuple]]:
+        """Generate a shard's message and reaction rows as whole NumPy columns
+        
+        Mirrors _generate_message_shard's distributions: types by weighted
+        categorical sampling, timestamps as cumulative sums of random gaps or
+        sorted instants over the room's lifetime, reactions as Poisson counts
+        over distinct participants. Timestamps are formatted as ISO strings,
+        the only form the rows are serialized in, and both row lists come back
+        as _CopyRows carrying their COPY text.
+        """
+        rng = np.random.default_rng(_derive_seed(self.seed, 'columnar-messages', start // ROOM_SHARD_SIZE))
+        rooms = self.rooms[start:start + ROOM_SHARD_SIZE]
+        room_count = len(rooms)
+        sizes = np.fromiter((len(r['participants']) for r in rooms), dtype=np.int64, count=room_count)
+        members = np.array([p for r in rooms for p in r['participants']], dtype=object)
+        member_offsets = np.cumsum(sizes) - sizes
+        reference_us = _to_epoch_us(self.reference_time)
+        minute_us = 60_000_000
+        
+        # Message counts and conversation starts per room, gaps per message
+        spread = self.topology == 'realistic' or self.delta
+        if self.topology == 'realistic':
+            scale = messages_per_room * (MESSAGE_VOLUME_ALPHA - 1) / MESSAGE_VOLUME_ALPHA
+            counts = np.maximum(1, (scale * (rng.pareto(MESSAGE_VOLUME_ALPHA, room_count) + 1)
+                                    * np.log2(sizes)).astype(np.int64))
+        else:
+            counts = rng.integers(5, messages_per_room + 1, room_count)
+        if self.delta:
+            shares = np.fromiter((self._append_share(r) for r in rooms), dtype=np.float64, count=room_count)
+            counts = (counts * shares + rng.random(room_count)).astype(np.int64)
+        if spread:
+            # Appends spread over the time since the room's last message
+            starts = np.fromiter((_to_epoch_us(self.resume_after.get(r['id'], r['created_at'])) for r in rooms),
+                                 dtype=np.int64, count=room_count)
+            lifetimes = np.maximum(0, (reference_us - starts) // 1_000_000)
+        else:
+            hours = rng.integers(1, 169, room_count)
+            starts = reference_us - (rng.random(room_count) * (hours * 60 + 1)).astype(np.int64) * minute_us
+        
+        total = int(counts.sum())
+        room_index = np.repeat(np.arange(room_count), counts)
+        first = np.cumsum(counts) - counts
+        local = np.arange(total) - first[room_index]
+        room_sizes = sizes[room_index]
+        
+        if spread:
+            # Uniform instants over each room's lifetime, sorted within the room
+            offsets = (rng.random(total) * (lifetimes[room_index] + 1)).astype(np.int64)
+            created_us = starts[room_index] + offsets[np.lexsort((offsets, room_index))] * 1_000_000
+        else:
+            # Exclusive cumulative sum of gaps, restarted in every room
+            gaps = rng.integers(1, 121, total) * minute_us
+            elapsed = np.cumsum(gaps) - gaps
+            created_us = starts[room_index] + elapsed - elapsed[first][room_index]
+        
+        # Ids: random bytes with the version 4 and RFC 4122 variant bits set,
+        # spelled out as rows of ASCII hex digits and dashes decoded in one call
+        raw = np.frombuffer(rng.bytes(16 * total), dtype=np.uint8).reshape(total, 16).copy()
+        raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+        raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+        hex_digits = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+        digits = np.empty((total, 32), dtype=np.uint8)
+        digits[:, 0::2] = hex_digits[raw >> 4]
+        digits[:, 1::2] = hex_digits[raw & 0x0F]
+        text = np.full((total, 37), ord('-'), dtype=np.uint8)
+        text[:, [i for i in range(36) if i not in (8, 13, 18, 23)]] = digits
+        text[:, 36] = ord('\n')
+        ids = text.tobytes()[:-1].decode('ascii').split('\n') if total else []
+        ids_array = np.array(ids, dtype=object)
+        
+        # Sender, plus a different participant for {name} mentions
+        sender_pos = (rng.random(total) * room_sizes).astype(np.int64)
+        senders = members[member_offsets[room_index] + sender_pos]
+        mention_pos = (sender_pos + 1 + (rng.random(total) * np.maximum(room_sizes - 1, 1)).astype(np.int64)) % room_sizes
+        mentions = members[member_offsets[room_index] + mention_pos]
+        
+        if self.corpus is not None:
+            contents = self.corpus.sample_columnar(rng, senders.tolist())
+        else:
+            templates = self.message_content_templates
+            template_index = rng.integers(0, len(templates), total)
+            meeting_hours = rng.integers(9, 18, total)
+            contents = [templates[t] for t in template_index.tolist()]
+            for i in np.flatnonzero(np.array(['{name}' in t for t in templates])[template_index]).tolist():
+                name = self.first_name_by_id.get(mentions[i], 'User') if room_sizes[i] > 1 else 'everyone'
+                contents[i] = contents[i].replace('{name}', name)
+            for i in np.flatnonzero(np.array(['{time}' in t for t in templates])[template_index]).tolist():
+                contents[i] = contents[i].replace('{time}', f'{meeting_hours[i]}:00')
+        
+        type_names = np.array(['text', 'image', 'file', 'audio', 'system'], dtype=object)
+        types = type_names[rng.choice(len(type_names), size=total, p=[0.8, 0.1, 0.05, 0.04, 0.01])]
+        
+        # 30% of messages after the first reply to an earlier message in the room
+        replies = (local > 0) & (rng.random(total) < 0.3)
+        targets = first[room_index] + (rng.random(total) * local).astype(np.int64)
+        reply_to = np.where(replies, ids_array[targets], None)
+        
+        edited = rng.random(total) < 0.1
+        edited_us = created_us + rng.integers(0, 31, total) * minute_us
+        deleted = rng.random(total) < 0.05
+        deleted_us = created_us + rng.integers(0, 61, total) * minute_us
+        
+        suffix = '+00:00' if self.reference_time.tzinfo is not None else ''
+        
+        def timestamps(values):
+            formatted = np.datetime_as_string(values.astype('datetime64[us]'), unit='us')
+            return np.char.add(formatted, suffix) if suffix else formatted
+        
+        def sparse_timestamps(values, present):
+            column = np.full(total, None, dtype=object)
+            column[present] = timestamps(values[present])
+            return column
+        
+        # Edit and delete times are only formatted where they are set
+        created = timestamps(created_us).astype(object)
+        edited_at = sparse_timestamps(edited_us, edited)
+        deleted_at = sparse_timestamps(deleted_us, deleted)
+        room_ids = np.array([r['id'] for r in rooms], dtype=object)[room_index].tolist()
+        senders = senders.tolist()
+        types = types.tolist()
+        created_at = created.tolist()
+        message_rows = list(zip(
+            ids, room_ids, senders, contents, types, reply_to.tolist(), created_at,
+            edited_at.tolist(), deleted_at.tolist()
+        ))
+        
+        # COPY text straight from the columns: contents escaped in one pass over
+        # the joined column (text cannot hold NUL), NULLs masked in per column
+        def nullable(values, present):
+            values = values.copy()
+            values[~present] = '\\N'
+            return values.tolist()
+        
+        joined = '\0'.join(contents)
+        escaped = (joined.replace('\\', '\\\\').replace('\t', '\\t')
+                   .replace('\n', '\\n').replace('\r', '\\r'))
+        escaped = contents if escaped == joined else escaped.split('\0')
+        message_text = '\n'.join(map('\t'.join, zip(
+            ids, room_ids, senders, escaped, types, nullable(reply_to, replies), created_at,
+            nullable(edited_at, edited), nullable(deleted_at, deleted)
+        )))
+        
+        # Reactions: Poisson counts capped at 3 distinct reactors per message
+        reaction_counts = np.minimum(rng.poisson(REACTIONS_PER_MESSAGE, total), np.minimum(3, room_sizes))
+        p0 = (rng.random(total) * room_sizes).astype(np.int64)
+        p1 = (p0 + 1 + (rng.random(total) * np.maximum(room_sizes - 1, 1)).astype(np.int64)) % room_sizes
+        low, high = np.minimum(p0, p1), np.maximum(p0, p1)
+        p2 = (rng.random(total) * np.maximum(room_sizes - 2, 1)).astype(np.int64)
+        p2 += p2 >= low
+        p2 += p2 >= high
+        
+        reacted = np.repeat(np.arange(total), reaction_counts)
+        rank = np.arange(len(reacted)) - (np.cumsum(reaction_counts) - reaction_counts)[reacted]
+        positions = np.stack([p0, p1, p2])[rank, reacted]
+        reactors = members[member_offsets[room_index[reacted]] + positions]
+        emojis = np.array(self.emojis, dtype=object)[rng.integers(0, len(self.emojis), len(reacted))]
+        reaction_rows = list(zip(ids_array[reacted].tolist(), reactors.tolist(), emojis.tolist(),
+                                 created[reacted].tolist()))
+        reaction_text = '\n'.join(map('\t'.join, reaction_rows))
+        
+        return _CopyRows(message_rows, message_text), _CopyRows(reaction_rows, reaction_text)
+    
     def generate_meetings(self, meeting_count: int = 8) -> List[Dict[str, Any]]:
-        """Generate meeting data with various states"""
+        """Generate meetings in upcoming, active and completed states
+        
+        Meetings come from fixed-size shards with their own RNG streams, like
+        rooms, so counts in the hundreds of thousands spread across workers and
+        output never depends on --workers. Titles repeat as recurring meetings.
+        """
         if not self.rooms:
             raise ValueError("Generate rooms first")
-            
+        
+        # Prefer group rooms. Filtered once here; shards, forked workers
+        # included, read this list instead of scanning every room
+        self.meeting_rooms = [r for r in self.rooms if r['type'] == 'group'] or self.rooms
+        
+        tasks = [(start, min(start + MEETING_SHARD_SIZE, meeting_count))
+                 for start in range(0, meeting_count, MEETING_SHARD_SIZE)]
+        
         meetings = []
+        for shard in self._map_shards(_meeting_shard_worker, self._generate_meeting_shard, tasks):
+            meetings.extend(shard)
         
-        meeting_titles = [
-            'Daily Standup', 'Sprint Planning', 'Code Review', 'Team Retrospective',
-            'Coffee Chat', 'Project Kickoff', 'Client Meeting', 'Design Review',
-            'Architecture Discussion', 'Product Demo', 'Weekly Sync', 'All Hands'
-        ]
+        self.meetings = meetings
+        return meetings
+    
+    def _generate_meeting_shard(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        """Generate meetings start..stop from the shard's own RNG stream"""
+        rng = self._rng('meetings', start // MEETING_SHARD_SIZE)
+        candidate_rooms = self.meeting_rooms
         
-        for i in range(min(meeting_count, len(meeting_titles))):
-            # Select a room (prefer group rooms)
-            group_rooms = [r for r in self.rooms if r['type'] == 'group']
-            room = random.choice(group_rooms if group_rooms else self.rooms)
-            
-            host_id = random.choice(room['participants'])
+        meetings = []
+        for i in range(start, stop):
+            room = rng.choice(candidate_rooms)
+            host_id = rng.choice(room['participants'])
+            title = self.meeting_titles[i % len(self.meeting_titles)]
             
             # Determine meeting state
-            meeting_state = random.choices(
+            meeting_state = rng.choices(
                 ['upcoming', 'active', 'completed'],
                 weights=[0.3, 0.2, 0.5]  # More completed meetings
             )[0]
             
-            scheduled_time = self._generate_meeting_time(meeting_state)
-            started_at = None
-            ended_at = None
-            
-            if meeting_state == 'active':
-                started_at = scheduled_time
-            elif meeting_state == 'completed':
-                started_at = scheduled_time
-                ended_at = started_at + timedelta(minutes=random.randint(15, 120))
+            scheduled_time, started_at, ended_at = self._generate_meeting_window(rng, meeting_state)
+            max_participants = rng.randint(5, 20)
+            livekit_room_name = f'meeting_{_random_uuid(rng).replace("-", "")}'
             
             meeting = {
-                'id': str(uuid.uuid4()),
+                'id': _random_uuid(rng),
                 'room_id': room['id'],
-                'livekit_room_name': f'meeting_{str(uuid.uuid4()).replace("-", "")}',
+                'livekit_room_name': livekit_room_name,
                 'host_id': host_id,
-                'title': meeting_titles[i],
-                'description': f'{meeting_titles[i]} meeting for the team',
+                'title': title,
+                'description': f'{title} meeting for the team',
                 'scheduled_for': scheduled_time,
                 'started_at': started_at,
                 'ended_at': ended_at,
-                'max_participants': random.randint(5, 20),
-                'participants': self._generate_meeting_participants(room['participants'], host_id, meeting_state),
-                'recording_url': f'https://recordings.example.com/{meeting_titles[i].lower().replace(" ", "_")}.mp4' if meeting_state == 'completed' and random.random() < 0.7 else None
+                'max_participants': max_participants,
+                # The host opens a started meeting, so the trigger-made host row joins at its start
+                'created_at': started_at or (self._random_append_time(rng) if self.delta
+                                             else self._random_past_time(rng, days=7)),
+                'participants': self._generate_meeting_participants(rng, room['participants'], host_id,
+                                                                    max_participants, started_at, ended_at),
+                'recording_url': f'https://recordings.example.com/{livekit_room_name}.mp4' if meeting_state == 'completed' and rng.random() < 0.7 else None
             }
             
             meetings.append(meeting)
         
-        self.meetings = meetings
         return meetings
     
-    def _generate_message_content(self, room: Dict, sender_id: str) -> str:
+    def _append_share(self, room: Dict[str, Any]) -> float:
+        """Share of a room's base message volume that falls in this append's window
+        
+        The base dataset spread the room's volume over its history up to the
+        snapshot, so an append carries the same rate over the time since:
+        a one-day append on a year-old room gets about 1/365 of it.
+        """
+        start = self.resume_after[room['id']]
+        window = (self.reference_time - start).total_seconds()
+        history = (start - room['created_at']).total_seconds()
+        return min(1.0, window / history) if history > 0 else 1.0
+    
+    def _generate_message_content(self, rng: random.Random, room: Dict, sender_id: str) -> str:
         """Generate realistic message content"""
-        template = random.choice(self.message_content_templates)
+        if self.corpus is not None:
+            return self.corpus.sample(rng, sender_id)
         
-        # Find sender name
-        sender = next((u for u in self.users if u['id'] == sender_id), None)
-        sender_name = sender['display_name'].split()[0] if sender else 'User'
+        template = rng.choice(self.message_content_templates)
         
-        # Find a random participant name for mentions
-        other_participants = [p for p in room['participants'] if p != sender_id]
-        if other_participants:
-            other_user = next((u for u in self.users if u['id'] == random.choice(other_participants)), None)
-            other_name = other_user['display_name'].split()[0] if other_user else 'User'
+        # Find a random participant name for mentions; redraw instead of
+        # copying the participant list, a room never lists the sender twice
+        participants = room['participants']
+        if len(participants) > 1:
+            other_id = rng.choice(participants)
+            while other_id == sender_id:
+                other_id = rng.choice(participants)
+            other_name = self.first_name_by_id.get(other_id, 'User')
         else:
             other_name = 'everyone'
         
         # Replace placeholders
         content = template.replace('{name}', other_name)
-        content = content.replace('{time}', f'{random.randint(9, 17)}:00')
+        content = content.replace('{time}', f'{rng.randint(9, 17)}:00')
         
         return content
     
-    def _determine_message_type(self) -> str:
+    def _determine_message_type(self, rng: random.Random) -> str:
         """Determine message type with realistic distribution"""
-        return random.choices(
+        return rng.choices(
             ['text', 'image', 'file', 'audio', 'system'],
             weights=[0.8, 0.1, 0.05, 0.04, 0.01]
         )[0]
     
-    def _generate_reactions(self, participant_ids: List[str]) -> List[Dict[str, Any]]:
-        """Generate realistic message reactions"""
-        reactions = []
-        
+    def _generate_reactions(self, rng: random.Random, participant_ids: List[str]) -> Tuple[Tuple[str, str], ...]:
+        """Generate realistic message reactions as (user_id, emoji) pairs"""
         # Some messages get reactions (30% chance)
-        if random.random() < 0.3:
-            reaction_count = random.randint(1, min(3, len(participant_ids)))
-            reactors = random.sample(participant_ids, reaction_count)
-            
-            for reactor_id in reactors:
-                reactions.append({
-                    'user_id': reactor_id,
-                    'emoji': random.choice(self.emojis)
-                })
+        if rng.random() < 0.3:
+            reaction_count = rng.randint(1, min(3, len(participant_ids)))
+            reactors = rng.sample(participant_ids, reaction_count)
+            return tuple((reactor_id, rng.choice(self.emojis)) for reactor_id in reactors)
         
-        return reactions
+        return ()
     
-    def _generate_meeting_participants(self, room_participants: List[str], host_id: str, meeting_state: str) -> List[Dict[str, Any]]:
-        """Generate meeting participant data"""
-        participants = []
+    def _generate_meeting_participants(self, rng: random.Random, room_participants: List[str], host_id: str,
+                                       max_participants: int, started_at: Optional[datetime],
+                                       ended_at: Optional[datetime]) -> List[Dict[str, Any]]:
+        """Generate meeting participants joining and leaving inside the meeting window
         
-        # Host is always a participant
-        host_participant = {
+        Upcoming meetings only list invitees. Otherwise the host is present
+        from start to end, and every guest who joins does so after the start
+        and leaves by the end; meetings still running are bounded by
+        reference_time and keep left_at open for guests who have not left.
+        """
+        participants = [{
             'user_id': host_id,
             'role': 'host',
-            'joined_at': None,
-            'left_at': None,
+            'joined_at': started_at,
+            'left_at': ended_at,
             'is_audio_enabled': True,
             'is_video_enabled': True,
             'connection_quality': 'excellent'
-        }
-        
-        if meeting_state != 'upcoming':
-            host_participant['joined_at'] = self._random_past_time(hours=1)
-            if meeting_state == 'completed':
-                host_participant['left_at'] = self._random_past_time(minutes=30)
+        }]
         
-        participants.append(host_participant)
+        # Sample one extra member and drop the host, rather than copying the
+        # member list without the host; large rooms host many meetings
+        guest_count = min(len(room_participants) - 1, max_participants - 1,
+                          1 + int(rng.expovariate(1 / MEETING_MEAN_GUESTS)))
+        guests = rng.sample(room_participants, guest_count + 1) if guest_count > 0 else []
+        if host_id in guests:
+            guests.remove(host_id)
+        elif guests:
+            guests.pop()
         
-        # Add other participants
-        other_participants = [p for p in room_participants if p != host_id]
-        participant_count = random.randint(1, min(len(other_participants), 5))
+        if started_at is not None:
+            window = max(1, int(((ended_at or self.reference_time) - started_at).total_seconds()))
         
-        for user_id in random.sample(other_participants, participant_count):
+        for user_id in guests:
             participant = {
                 'user_id': user_id,
                 'role': 'participant',
                 'joined_at': None,
                 'left_at': None,
-                'is_audio_enabled': random.choice([True, False]),
-                'is_video_enabled': random.choice([True, False]),
-                'connection_quality': random.choice(['excellent', 'good', 'poor'])
+                'is_audio_enabled': rng.choice([True, False]),
+                'is_video_enabled': rng.choice([True, False]),
+                'connection_quality': rng.choice(['excellent', 'good', 'poor'])
             }
             
-            if meeting_state != 'upcoming' and random.random() > 0.2:  # 80% actually join
-                participant['joined_at'] = self._random_past_time(hours=1)
-                if meeting_state == 'completed':
-                    participant['left_at'] = self._random_past_time(minutes=random.randint(5, 90))
+            if started_at is not None and rng.random() < MEETING_ATTENDANCE:
+                if rng.random() < MEETING_LATE_JOIN_RATE:
+                    offset = rng.randrange(window)
+                else:
+                    offset = min(int(rng.expovariate(1 / MEETING_JOIN_SPREAD_SECONDS)), window - 1)
+                remaining = window - offset
+                participant['joined_at'] = started_at + timedelta(seconds=offset)
+                if rng.random() < MEETING_EARLY_LEAVE_RATE:
+                    stay = rng.randint(1, remaining)
+                elif ended_at is not None:
+                    stay = max(1, remaining - rng.randint(0, MEETING_END_JITTER_SECONDS))
+                else:
+                    stay = None
+                if stay is not None:
+                    participant['left_at'] = participant['joined_at'] + timedelta(seconds=stay)
             
             participants.append(participant)
         
         return participants
     
-    def _generate_meeting_time(self, meeting_state: str) -> datetime:
-        """Generate meeting time based on state"""
+    def _generate_meeting_window(self, rng: random.Random,
+                                 meeting_state: str) -> Tuple[datetime, Optional[datetime], Optional[datetime]]:
+        """Generate (scheduled_for, started_at, ended_at) for a meeting state
+        
+        Active meetings started before reference_time and completed ones
+        ended before it, so every participant event is in the past. Appends
+        keep both inside the window since the snapshot, like their messages.
+        """
         if meeting_state == 'upcoming':
-            return datetime.now() + timedelta(hours=random.randint(1, 48))
-        elif meeting_state == 'active':
-            return datetime.now() - timedelta(minutes=random.randint(5, 60))
+            return self._random_future_time(rng, self.reference_time + timedelta(hours=1), hours=47), None, None
+        if self.delta:
+            length = timedelta(minutes=rng.randint(5, 60) if meeting_state == 'active' else rng.randint(15, 120))
+            length = min(length, (self.reference_time - self.resumed_from) / 2)
+            if meeting_state == 'active':
+                started_at, ended_at = self.reference_time - length, None
+            else:
+                started_at = self._random_append_time(rng, self.reference_time - length)
+                ended_at = started_at + length
+            scheduled_time = max(started_at - timedelta(seconds=rng.randint(0, MEETING_START_DELAY_SECONDS)),
+                                 self.resumed_from + timedelta(microseconds=1))
+            return scheduled_time, started_at, ended_at
+        if meeting_state == 'active':
+            duration = None
+            scheduled_time = self.reference_time - timedelta(minutes=rng.randint(5, 60))
         else:  # completed
-            return self._random_past_time(hours=random.randint(1, 168))
+            duration = timedelta(minutes=rng.randint(15, 120))
+            scheduled_time = (self._random_past_time(rng, hours=168) - duration
+                              - timedelta(seconds=MEETING_START_DELAY_SECONDS))
+        started_at = scheduled_time + timedelta(seconds=rng.randint(0, MEETING_START_DELAY_SECONDS))
+        return scheduled_time, started_at, started_at + duration if duration is not None else None
     
-    def _random_past_time(self, days: int = 0, hours: int = 0, minutes: int = 0) -> datetime:
+    def _random_past_time(self, rng: random.Random, days: int = 0, hours: int = 0, minutes: int = 0) -> datetime:
         """Generate a random time in the past"""
         total_minutes = days * 24 * 60 + hours * 60 + minutes
-        random_minutes = random.randint(0, total_minutes)
-        return datetime.now() - timedelta(minutes=random_minutes)
+        random_minutes = rng.randint(0, total_minutes)
+        return self.reference_time - timedelta(minutes=random_minutes)
+    
+    def _random_append_time(self, rng: random.Random, latest: Optional[datetime] = None) -> datetime:
+        """Generate a random time after the resumed snapshot, up to latest or reference_time"""
+        span = ((latest or self.reference_time) - self.resumed_from) // timedelta(microseconds=1)
+        return self.resumed_from + timedelta(microseconds=rng.randint(1, max(1, span)))
     
-    def _random_future_time(self, base_time: datetime, days: int = 0, hours: int = 0, minutes: int = 0) -> datetime:
+    def _random_future_time(self, rng: random.Random, base_time: datetime, days: int = 0, hours: int = 0,
+                            minutes: int = 0) -> datetime:
         """Generate a random time in the future from base_time"""
         total_minutes = days * 24 * 60 + hours * 60 + minutes
-        random_minutes = random.randint(0, total_minutes)
+        random_minutes = rng.randint(0, total_minutes)
         return base_time + timedelta(minutes=random_minutes)
     
-    def generate_sql(self, output_file: str = None) -> str:
-        """Generate SQL INSERT statements for all data"""
-        sql_statements = []
-        
-        # Clear existing data
-        sql_statements.append("-- Clear existing test data")
-        sql_statements.append("DELETE FROM message_reactions;")
-        sql_statements.append("DELETE FROM message_status;")
-        sql_statements.append("DELETE FROM messages;")
-        sql_statements.append("DELETE FROM typing_indicators;")
-        sql_statements.append("DELETE FROM user_presence;")
-        sql_statements.append("DELETE FROM room_participants;")
-        sql_statements.append("DELETE FROM rooms;")
-        sql_statements.append("DELETE FROM meeting_recordings;")
-        sql_statements.append("DELETE FROM meeting_invitations;")
-        sql_statements.append("DELETE FROM meeting_participants;")
-        sql_statements.append("DELETE FROM meetings;")
-        sql_statements.append("DELETE FROM user_profiles;")
-        sql_statements.append("")
-        
-        # Insert users
-        sql_statements.append("-- Insert users")
-        for user in self.users:
-            sql_statements.append(
-                f"INSERT INTO user_profiles (id, display_name, avatar_url, phone_number, status_message, is_online, last_seen) "
-                f"VALUES ('{user['id']}', '{user['display_name']}', '{user['avatar_url']}', '{user['phone_number']}', "
-                f"'{user['status_message']}', {user['is_online']}, '{user['last_seen'].isoformat()}');"
-            )
+    def iter_churn_events(self, duration: float, typing_rate: float = 2.0,
+                          presence_rate: float = 1.0) -> Iterator[Tuple[float, str, str, Optional[str]]]:
+        """Yield typing and presence events as (seconds, event, user_id, room_id), in time order
+        
+        Every user is a Poisson process per minute of ``typing_rate`` typing
+        bursts in one of their rooms, which start and usually stop, and of
+        ``presence_rate`` online/offline flips starting from offline. room_id
+        is None for presence events. Only CHURN_WINDOW_SECONDS of events are
+        held at a time.
+        """
+        if not self.rooms:
+            raise ValueError("Generate rooms first")
         
-        # Insert rooms
-        sql_statements.append("\n-- Insert rooms")
+        rooms_by_user = {}
         for room in self.rooms:
-            name_value = f"'{room['name']}'" if room['name'] else "NULL"
-            desc_value = f"'{room['description']}'" if room['description'] else "NULL"
-            avatar_value = f"'{room['avatar_url']}'" if room['avatar_url'] else "NULL"
-            
-            sql_statements.append(
-                f"INSERT INTO rooms (id, name, description, type, created_by, avatar_url, last_message_at, created_at) "
-                f"VALUES ('{room['id']}', {name_value}, {desc_value}, '{room['type']}', '{room['created_by']}', "
-                f"{avatar_value}, '{room['last_message_at'].isoformat()}', '{room['created_at'].isoformat()}');"
-            )
-            
-            # Insert room participants
             for participant_id in room['participants']:
-                role = 'admin' if participant_id == room['created_by'] else 'member'
-                sql_statements.append(
-                    f"INSERT INTO room_participants (room_id, user_id, role, joined_at, is_active) "
-                    f"VALUES ('{room['id']}', '{participant_id}', '{role}', '{room['created_at'].isoformat()}', true);"
-                )
-        
-        # Insert messages
-        sql_statements.append("\n-- Insert messages")
-        for message in self.messages:
-            reply_to_value = f"'{message['reply_to']}'" if message['reply_to'] else "NULL"
-            edited_at_value = f"'{message['edited_at'].isostring()}'" if message['edited_at'] else "NULL"
-            deleted_at_value = f"'{message['deleted_at'].isostring()}'" if message['deleted_at'] else "NULL"
+                rooms_by_user.setdefault(participant_id, []).append(room['id'])
+        user_ids = [u['id'] for u in self.users]
+        typing_rate /= 60
+        presence_rate /= 60
+        online = [False] * len(user_ids)
+        typing_until = [0.0] * len(user_ids)
+        stops = []
+        
+        for window in range(math.ceil(duration / CHURN_WINDOW_SECONDS)):
+            start = window * CHURN_WINDOW_SECONDS
+            end = min(start + CHURN_WINDOW_SECONDS, duration)
+            events = []
+            for shard_start in range(0, len(user_ids), ROOM_SHARD_SIZE):
+                rng = self._rng('churn', window, shard_start // ROOM_SHARD_SIZE)
+                for i in range(shard_start, min(shard_start + ROOM_SHARD_SIZE, len(user_ids))):
+                    user_id = user_ids[i]
+                    rooms = rooms_by_user.get(user_id)
+                    if rooms and typing_rate:
+                        at = start + rng.expovariate(typing_rate)
+                        while at < end:
+                            # One burst at a time; starts while still typing are dropped
+                            if at >= typing_until[i]:
+                                room_id = rng.choice(rooms)
+                                typing_until[i] = at + rng.uniform(*CHURN_TYPING_SECONDS)
+                                events.append((at, 'typing_start', user_id, room_id))
+                                if rng.random() >= CHURN_ABANDONED_TYPING and typing_until[i] < duration:
+                                    heapq.heappush(stops, (typing_until[i], 'typing_stop', user_id, room_id))
+                            at += rng.expovariate(typing_rate)
+                    if presence_rate:
+                        at = start + rng.expovariate(presence_rate)
+                        while at < end:
+                            online[i] = not online[i]
+                            events.append((at, 'online' if online[i] else 'offline', user_id, None))
+                            at += rng.expovariate(presence_rate)
+            while stops and stops[0][0] < end:
+                events.append(heapq.heappop(stops))
+            events.sort(key=lambda event: event[0])
+            yield from events
+    
+    def iter_table_rows(self, messages: Optional[Iterable[MessageRecord]] = None,
+                        defer_triggers: bool = False,
+                        message_shards: Optional[Iterable[Tuple[List[tuple], List[tuple]]]] = None
+                        ) -> Iterator[Tuple[str, Iterable[tuple]]]:
+        """Yield (table, rows) pairs in foreign-key order
+        
+        Rows are tuples matching TABLE_COLUMNS[table]. ``messages`` defaults to
+        ``self.messages``; pass ``iter_messages()`` to stream messages without
+        materializing them, or pass ``iter_message_shards()`` as
+        ``message_shards`` to stream ready-made rows. Reactions are spooled
+        while messages stream, so message_reactions rows are only complete
+        once messages are consumed.
+        
+        With ``defer_triggers`` the rows DEFERRED_MESSAGE_TRIGGERS would write
+        are produced here instead: message_status rows for every other room
+        participant, and rooms.last_message_at from ``room_last_message_at``,
+        which is complete once messages are consumed. A ``delta`` generator
+        skips BASE_TABLES, which the resumed dataset already holds. Row
+        counts per table are kept in ``table_rows``.
+        """
+        if message_shards is None:
+            message_shards = _chunked_message_rows(self.messages if messages is None else messages)
+        
+        table_rows = self.table_rows = {}
+        if not self.delta:
+            table_rows['auth.users'] = len(self.users)
+            table_rows['user_profiles'] = len(self.users)
+            table_rows['rooms'] = len(self.rooms)
+            table_rows['room_participants'] = sum(len(r['participants']) for r in self.rooms)
+            yield 'auth.users', ((u['id'], f"{u['id']}@{SEEDED_EMAIL_DOMAIN}") for u in self.users)
             
-            sql_statements.append(
-                f"INSERT INTO messages (id, room_id, user_id, content, type, reply_to, created_at, edited_at, deleted_at) "
-                f"VALUES ('{message['id']}', '{message['room_id']}', '{message['user_id']}', '{message['content']}', "
-                f"'{message['type']}', {reply_to_value}, '{message['created_at'].isoformat()}', {edited_at_value}, {deleted_at_value});"
+            yield 'user_profiles', (
+                (u['id'], u['display_name'], u['avatar_url'], u['phone_number'], u['status_message'],
+                 u['is_online'], u['last_seen'])
+                for u in self.users
             )
             
-            # Insert reactions
-            for reaction in message['reactions']:
-                sql_statements.append(
-                    f"INSERT INTO message_reactions (message_id, user_id, emoji, created_at) "
-                    f"VALUES ('{message['id']}', '{reaction['user_id']}', '{reaction['emoji']}', '{message['created_at'].isoformat()}');"
-                )
-        
-        # Insert meetings
-        sql_statements.append("\n-- Insert meetings")
-        for meeting in self.meetings:
-            started_at_value = f"'{meeting['started_at'].isoformat()}'" if meeting['started_at'] else "NULL"
-            ended_at_value = f"'{meeting['ended_at'].isoformat()}'" if meeting['ended_at'] else "NULL"
-            recording_value = f"'{meeting['recording_url']}'" if meeting['recording_url'] else "NULL"
-            
-            sql_statements.append(
-                f"INSERT INTO meetings (id, room_id, livekit_room_name, host_id, title, description, scheduled_for, started_at, ended_at, max_participants, recording_url) "
-                f"VALUES ('{meeting['id']}', '{meeting['room_id']}', '{meeting['livekit_room_name']}', '{meeting['host_id']}', "
-                f"'{meeting['title']}', '{meeting['description']}', '{meeting['scheduled_for'].isoformat()}', {started_at_value}, "
-                f"{ended_at_value}, {meeting['max_participants']}, {recording_value});"
+            yield 'rooms', (
+                (r['id'], r['name'], r['description'], r['type'], r['created_by'], r['avatar_url'],
+                 r['last_message_at'], r['created_at'])
+                for r in self.rooms
             )
             
-            # Insert meeting participants
-            for participant in meeting['participants']:
-                joined_at_value = f"'{participant['joined_at'].isoformat()}'" if participant['joined_at'] else "NULL"
-                left_at_value = f"'{participant['left_at'].isoformat()}'" if participant['left_at'] else "NULL"
+            yield 'room_participants', (
+                (r['id'], participant_id, 'admin' if participant_id == r['created_by'] else 'member',
+                 r['created_at'], True)
+                for r in self.rooms
+                for participant_id in r['participants']
+            )
+        
+        reactions = _RowSpool()
+        statuses = _RowSpool() if defer_triggers else None
+        participants_by_room = {r['id']: r['participants'] for r in self.rooms} if defer_triggers else None
+        self.room_last_message_at = {}
+        needles = [needle for needle, _rate in self.corpus.needles] if self.corpus is not None else []
+        self.needle_counts = dict.fromkeys(needles, 0)
+        
+        def message_blocks():
+            last_message_at = self.room_last_message_at
+            needle_counts = self.needle_counts
+            table_rows['messages'] = 0
+            for rows, reaction_rows in message_shards:
+                table_rows['messages'] += len(rows)
+                reactions.extend(reaction_rows)
+                for needle in needles:
+                    needle_counts[needle] += sum(needle in row[3] for row in rows)
+                if isinstance(rows, _CopyRows) and not defer_triggers:
+                    # Columnar shards keep each room's messages in time order,
+                    # so the last row per room is its latest
+                    latest = dict(zip([row[1] for row in rows], [row[6] for row in rows]))
+                    for room_id, created_at in latest.items():
+                        previous = last_message_at.get(room_id)
+                        if previous is None or created_at > previous:
+                            last_message_at[room_id] = created_at
+                    yield rows
+                    continue
+                for message_id, room_id, user_id, *_, created_at, _edited, _deleted in rows:
+                    if defer_triggers:
+                        # Mirror create_message_status and update_room_last_message
+                        for participant_id in participants_by_room[room_id]:
+                            if participant_id != user_id:
+                                statuses.append((message_id, participant_id, 'sent', created_at))
+                    previous = last_message_at.get(room_id)
+                    if previous is None or created_at > previous:
+                        last_message_at[room_id] = created_at
+                yield rows
+            table_rows['message_reactions'] = reactions.count
+            if defer_triggers:
+                table_rows['message_status'] = statuses.count
+        
+        yield 'messages', _RowBlocks(message_blocks())
+        yield 'message_reactions', reactions
+        if defer_triggers:
+            yield 'message_status', statuses
+        
+        table_rows['meetings'] = len(self.meetings)
+        table_rows['meeting_participants'] = sum(len(m['participants']) - 1 for m in self.meetings)
+        yield 'meetings', (
+            (m['id'], m['room_id'], m['livekit_room_name'], m['host_id'], m['title'], m['description'],
+             m['scheduled_for'], m['started_at'], m['ended_at'], m['max_participants'], m['recording_url'],
+             m['created_at'])
+            for m in self.meetings
+        )
+        
+        # add_host_as_participant_trigger inserts the host row for every meeting,
+        # joined at the meeting's created_at; MEETING_HOST_SQL then aligns it with the window
+        yield 'meeting_participants', (
+            (m['id'], p['user_id'], p['role'], p['joined_at'], p['left_at'], p['is_audio_enabled'],
+             p['is_video_enabled'], p['connection_quality'])
+            for m in self.meetings
+            for p in m['participants']
+            if p['role'] != 'host'
+        )
+    
+    def iter_sql(self, messages: Optional[Iterable[MessageRecord]] = None, fmt: str = 'insert',
+                 batch_size: int = DEFAULT_BATCH_SIZE, commit_every: int = 0,
+                 defer_triggers: bool = False,
+                 message_shards: Optional[Iterable[Tuple[List[tuple], List[tuple]]]] = None) -> Iterator[str]:
+        """Yield SQL lines for all data one at a time
+        
+        ``fmt`` is ``insert`` for one INSERT per row, ``batch`` for multi-row
+        INSERTs of ``batch_size`` rows, or ``copy`` for one ``COPY ... FROM
+        STDIN`` block per table, loadable with ``psql -f``. For the INSERT
+        formats, ``commit_every`` > 0 wraps every N statements in BEGIN/COMMIT.
+        COPY data the NumPy backend builds per shard comes as one multi-line
+        piece, so lines are not always single rows. ``defer_triggers``
+        disables the per-message triggers for the load and writes their
+        message_status rows and last_message_at values directly.
+        """
+        if fmt not in SQL_FORMATS:
+            raise ValueError(f"Unknown SQL format: {fmt}")
+        if commit_every and fmt == 'copy':
+            raise ValueError("commit_every only applies to the INSERT formats")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        
+        yield from self._sql_prelude(defer_triggers)
+        
+        in_transaction = False
+        statement_count = 0
+        
+        for table, rows in self.iter_table_rows(messages, defer_triggers, message_shards):
+            yield f"\n-- Insert {table}"
+            if table in TRIGGERLESS_TABLES:
+                yield "SET session_replication_role = replica;"
+            if fmt == 'copy':
+                yield from _copy_block(table, TABLE_COLUMNS[table], rows)
+            else:
+                if fmt == 'batch':
+                    statements = _batched_insert_statements(table, TABLE_COLUMNS[table], rows, batch_size)
+                else:
+                    statements = _insert_statements(table, TABLE_COLUMNS[table], rows)
                 
-                sql_statements.append(
-                    f"INSERT INTO meeting_participants (meeting_id, user_id, role, joined_at, left_at, is_audio_enabled, is_video_enabled, connection_quality) "
-                    f"VALUES ('{meeting['id']}', '{participant['user_id']}', '{participant['role']}', {joined_at_value}, {left_at_value}, "
-                    f"{participant['is_audio_enabled']}, {participant['is_video_enabled']}, '{participant['connection_quality']}');"
-                )
+                for statement in statements:
+                    if commit_every and not in_transaction:
+                        yield "BEGIN;"
+                        in_transaction = True
+                    yield statement
+                    statement_count += 1
+                    if commit_every and statement_count % commit_every == 0:
+                        yield "COMMIT;"
+                        in_transaction = False
+            if table in TRIGGERLESS_TABLES:
+                yield "RESET session_replication_role;"
+        
+        if in_transaction:
+            yield "COMMIT;"
+        
+        yield from self._sql_postlude(defer_triggers, batch_size)
+        
+        yield "\n-- Test data generation completed"
+        yield "SELECT 'Advanced test data generated successfully!' as status;"
+    
+    def _sql_prelude(self, defer_triggers: bool) -> Iterator[str]:
+        """SQL run before any rows: clearing old data and disabling deferred triggers"""
+        # Clear existing data, unless appending to it
+        if self.delta:
+            yield f"-- Append-only delta #{self.epoch}; existing data is kept"
+        else:
+            yield "-- Clear existing test data"
+            for table in CLEARED_TABLES:
+                yield f"DELETE FROM {table};"
+            yield f"{CLEAR_SEEDED_USERS_SQL};"
+        
+        if defer_triggers:
+            yield "\n-- Disable per-message triggers; if this load fails, re-enable them by hand"
+            for trigger in DEFERRED_MESSAGE_TRIGGERS:
+                yield f"ALTER TABLE messages DISABLE TRIGGER {trigger};"
+    
+    def _sql_postlude(self, defer_triggers: bool, batch_size: int) -> Iterator[str]:
+        """SQL run after every row: host row fixes, the deferred triggers' room updates, then re-enabling them"""
+        yield "\n-- Align the trigger-made host rows with their meeting windows"
+        for statement in MEETING_HOST_SQL:
+            yield f"{statement};"
+        if defer_triggers:
+            yield "\n-- Set rooms.last_message_at as update_room_last_message would have"
+            yield from _room_last_message_updates(self.room_last_message_at.items(), batch_size)
+            for trigger in DEFERRED_MESSAGE_TRIGGERS:
+                yield f"ALTER TABLE messages ENABLE TRIGGER {trigger};"
+    
+    def write_sql_dir(self, output_dir: str, messages: Optional[Iterable[MessageRecord]] = None,
+                      fmt: str = 'copy', batch_size: int = DEFAULT_BATCH_SIZE, defer_triggers: bool = False,
+                      message_shards: Optional[Iterable[Tuple[List[tuple], List[tuple]]]] = None,
+                      compression: str = 'none', chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Dict[str, Any]:
+        """Write one file per table chunk plus manifest.json, returning the manifest
+        
+        Chunks hold whole rows and close once they pass ``chunk_bytes`` of
+        uncompressed SQL. messages chunks close at the first room boundary
+        past it (in batch format, after at least ``batch_size`` more rows):
+        replies never cross rooms, so each reply shares a chunk with its
+        target, and no room's last_message_at is raced by two chunks. Other
+        tables' COPY text from the NumPy backend is written a shard at a time,
+        so their chunks close between shards. Each chunk loads on its own, in a single transaction, so chunks of
+        tables in the same LOAD_STAGES stage can load in parallel sessions once
+        the previous stage is done. prepare and finish files run before and
+        after everything else.
+        """
+        if fmt not in SQL_FORMATS:
+            raise ValueError(f"Unknown SQL format: {fmt}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        if compression == 'zstd' and zstandard is None:
+            raise RuntimeError("zstd compression needs zstandard: pip install zstandard")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        
+        os.makedirs(output_dir, exist_ok=True)
+        extension = COMPRESSIONS[compression]
+        stage_of = {table: i for i, stage in enumerate(LOAD_STAGES) for table in stage}
+        manifest = {
+            'format': fmt,
+            'compression': compression,
+            'defer_triggers': defer_triggers,
+            'delta': self.delta,
+            'stages': [{'tables': list(stage), 'files': []} for stage in LOAD_STAGES],
+            'tables': {},
+        }
+        
+        def write_lines(name: str, lines: Iterable[str]) -> str:
+            with _SqlChunkWriter(os.path.join(output_dir, name + extension), compression) as writer:
+                for line in lines:
+                    writer.write(line)
+            return name + extension
+        
+        manifest['prepare'] = write_lines('00-prepare.sql', self._sql_prelude(defer_triggers))
+        
+        for table, rows in self.iter_table_rows(messages, defer_triggers, message_shards):
+            stage = stage_of[table]
+            if fmt == 'copy':
+                header = f"COPY {table} ({', '.join(TABLE_COLUMNS[table])}) FROM STDIN;"
+                footer = '\\.'
+            else:
+                header, footer = 'BEGIN;', 'COMMIT;'
+            if table in TRIGGERLESS_TABLES:
+                header = f"SET session_replication_role = replica;\n{header}"
+                footer = f"{footer}\nRESET session_replication_role;"
+            
+            files = []
+            writer = None
+            # Messages may only be split between rooms; others anywhere
+            split_anywhere = not isinstance(rows, _RowBlocks)
+            runs = [rows] if split_anywhere else _room_runs(rows.blocks(), batch_size if fmt == 'batch' else 1)
+            for run in runs:
+                for row_count, piece in _sql_pieces(table, run, fmt, batch_size):
+                    if writer is None:
+                        name = f'{stage + 1:02d}-{table}-{len(files):04d}.sql{extension}'
+                        writer = _SqlChunkWriter(os.path.join(output_dir, name), compression)
+                        writer.write(header)
+                    writer.write(piece, row_count)
+                    if split_anywhere and writer.uncompressed_bytes >= chunk_bytes:
+                        writer.write(footer)
+                        files.append(writer.close(name, table))
+                        writer = None
+                if writer is not None and writer.uncompressed_bytes >= chunk_bytes:
+                    writer.write(footer)
+                    files.append(writer.close(name, table))
+                    writer = None
+            if writer is not None:
+                writer.write(footer)
+                files.append(writer.close(name, table))
+            
+            manifest['stages'][stage]['files'].extend(files)
+            manifest['tables'][table] = {'rows': sum(f['rows'] for f in files), 'files': len(files)}
+        
+        manifest['finish'] = write_lines('99-finish.sql', self._sql_postlude(defer_triggers, batch_size))
+        if self.needle_counts:
+            manifest['needles'] = self.needle_counts
+        
+        with open(os.path.join(output_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
         
-        sql_statements.append("\n-- Test data generation completed")
-        sql_statements.append("SELECT 'Advanced test data generated successfully!' as status;")
+        print(f"SQL chunks and manifest saved to {output_dir}")
+        return manifest
+    
+    def write_sql(self, output_file: str, messages: Optional[Iterable[MessageRecord]] = None,
+                  fmt: str = 'insert', batch_size: int = DEFAULT_BATCH_SIZE, commit_every: int = 0,
+                  defer_triggers: bool = False,
+                  message_shards: Optional[Iterable[Tuple[List[tuple], List[tuple]]]] = None,
+                  chunk_size: int = SQL_WRITE_CHUNK) -> int:
+        """Stream SQL lines to output_file in chunks, returning the line count"""
+        lines = self.iter_sql(messages, fmt, batch_size, commit_every, defer_triggers, message_shards)
+        written = 0
+        
+        with open(output_file, 'w') as f:
+            chunk = []
+            buffered = 0
+            for line in lines:
+                chunk.append(line)
+                buffered += len(line)
+                if len(chunk) >= chunk_size or buffered >= SQL_WRITE_BYTES:
+                    chunk.append('')
+                    f.write('\n'.join(chunk))
+                    written += len(chunk) - 1
+                    chunk = []
+                    buffered = 0
+            chunk.append('')
+            f.write('\n'.join(chunk))
+            written += len(chunk) - 1
         
-        sql_content = '\n'.join(sql_statements)
+        print(f"SQL generated and saved to {output_file}")
+        return written
+    
+    def generate_sql(self, output_file: str = None, fmt: str = 'insert', batch_size: int = DEFAULT_BATCH_SIZE,
+                     commit_every: int = 0) -> str:
+        """Generate SQL for all data"""
+        sql_content = '\n'.join(self.iter_sql(fmt=fmt, batch_size=batch_size, commit_every=commit_every)) + '\n'
         
         if output_file:
             with open(output_file, 'w') as f:
@@ -478,30 +2087,1097 @@ class TestDataGenerator:
         
         return sql_content
 
+class PostgresLoader:
+    """Stream generated rows straight into Postgres over a small connection pool
+    
+    Tables are loaded stage by stage in foreign-key order (LOAD_STAGES); the
+    tables of one stage load concurrently, each on its own pooled connection.
+    """
+    
+    def __init__(self, dsn: str, connections: int = 4, method: str = 'copy',
+                 batch_size: int = DEFAULT_BATCH_SIZE, defer_triggers: bool = False):
+        if psycopg is None:
+            raise RuntimeError("Direct loading needs psycopg 3: pip install 'psycopg[binary]'")
+        if method not in LOAD_METHODS:
+            raise ValueError(f"Unknown load method: {method}")
+        self.dsn = dsn
+        self.connections = max(1, connections)
+        self.method = method
+        self.batch_size = batch_size
+        self.defer_triggers = defer_triggers
+    
+    def load(self, generator: TestDataGenerator, messages: Optional[Iterable[MessageRecord]] = None,
+             message_shards: Optional[Iterable[Tuple[List[tuple], List[tuple]]]] = None) -> Dict[str, Dict[str, float]]:
+        """Clear the seeded tables (unless appending) and load every table, returning per-table stats"""
+        tables = dict(generator.iter_table_rows(messages, self.defer_triggers, message_shards))
+        pool = queue.Queue()
+        for _ in range(self.connections):
+            pool.put(psycopg.connect(self.dsn))
+        
+        stats = {}
+        try:
+            if not generator.delta:
+                conn = pool.get()
+                with conn.cursor() as cur:
+                    for table in CLEARED_TABLES:
+                        cur.execute(f"DELETE FROM {table}")
+                    cur.execute(CLEAR_SEEDED_USERS_SQL)
+                conn.commit()
+                pool.put(conn)
+            
+            if self.defer_triggers:
+                self._set_message_triggers(pool, enabled=False)
+            try:
+                with ThreadPoolExecutor(self.connections) as executor:
+                    for stage in LOAD_STAGES:
+                        futures = {
+                            table: executor.submit(self._load_table, pool, table, tables[table])
+                            for table in stage if table in tables
+                        }
+                        for table, future in futures.items():
+                            stats[table] = future.result()
+                            self._report(table, stats[table])
+                
+                stats['meeting_participants.host'] = self._align_host_rows(pool)
+                self._report('meeting_participants.host', stats['meeting_participants.host'])
+                
+                if self.defer_triggers:
+                    stats['rooms.last_message_at'] = self._update_last_message_at(pool, generator.room_last_message_at)
+                    self._report('rooms.last_message_at', stats['rooms.last_message_at'])
+            finally:
+                if self.defer_triggers:
+                    self._set_message_triggers(pool, enabled=True)
+        finally:
+            while not pool.empty():
+                pool.get().close()
+        
+        return stats
+    
+    def _set_message_triggers(self, pool: queue.Queue, enabled: bool):
+        """Enable or disable DEFERRED_MESSAGE_TRIGGERS in a committed transaction"""
+        conn = pool.get()
+        try:
+            conn.rollback()
+            with conn.cursor() as cur:
+                for trigger in DEFERRED_MESSAGE_TRIGGERS:
+                    cur.execute(f"ALTER TABLE messages {'ENABLE' if enabled else 'DISABLE'} TRIGGER {trigger}")
+            conn.commit()
+        finally:
+            pool.put(conn)
+    
+    def _align_host_rows(self, pool: queue.Queue) -> Dict[str, float]:
+        """Run MEETING_HOST_SQL for the host rows add_host_as_participant inserted"""
+        conn = pool.get()
+        started = time.perf_counter()
+        count = 0
+        try:
+            with conn.cursor() as cur:
+                for statement in MEETING_HOST_SQL:
+                    cur.execute(statement)
+                    count += cur.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.put(conn)
+        
+        elapsed = time.perf_counter() - started
+        return {'rows': count, 'seconds': elapsed, 'rows_per_sec': count / elapsed if elapsed else 0.0}
+    
+    def _update_last_message_at(self, pool: queue.Queue, last_message_at: Dict[str, datetime]) -> Dict[str, float]:
+        """Apply the per-room last_message_at values computed during the load"""
+        conn = pool.get()
+        started = time.perf_counter()
+        items = iter((last, room_id) for room_id, last in last_message_at.items())
+        try:
+            with conn.cursor() as cur, conn.pipeline():
+                while True:
+                    batch = list(islice(items, self.batch_size))
+                    if not batch:
+                        break
+                    cur.executemany("UPDATE rooms SET last_message_at = %s WHERE id = %s", batch)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.put(conn)
+        
+        elapsed = time.perf_counter() - started
+        count = len(last_message_at)
+        return {'rows': count, 'seconds': elapsed, 'rows_per_sec': count / elapsed if elapsed else 0.0}
+    
+    def _load_table(self, pool: queue.Queue, table: str, rows: Iterable[tuple]) -> Dict[str, float]:
+        """Load one table on a pooled connection and time it"""
+        conn = pool.get()
+        started = time.perf_counter()
+        try:
+            if table in TRIGGERLESS_TABLES:
+                conn.execute("SET LOCAL session_replication_role = replica")
+            if self.method == 'copy':
+                count = self._copy_rows(conn, table, rows)
+            else:
+                count = self._insert_rows(conn, table, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.put(conn)
+        
+        elapsed = time.perf_counter() - started
+        return {'rows': count, 'seconds': elapsed, 'rows_per_sec': count / elapsed if elapsed else 0.0}
+    
+    def _copy_rows(self, conn, table: str, rows: Iterable[tuple]) -> int:
+        """Load rows with COPY FROM STDIN"""
+        count = 0
+        with conn.cursor() as cur:
+            with cur.copy(f"COPY {table} ({', '.join(TABLE_COLUMNS[table])}) FROM STDIN") as copy:
+                for block in _row_blocks(rows):
+                    if isinstance(block, _CopyRows):
+                        if block:
+                            copy.write(block.copy_text + '\n')
+                            count += len(block)
+                        continue
+                    for row in block:
+                        copy.write_row(row)
+                        count += 1
+        return count
+    
+    def _insert_rows(self, conn, table: str, rows: Iterable[tuple]) -> int:
+        """Load rows with executemany batches sent in pipeline mode"""
+        columns = TABLE_COLUMNS[table]
+        statement = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        count = 0
+        rows = iter(rows)
+        with conn.cursor() as cur, conn.pipeline():
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                cur.executemany(statement, batch)
+                count += len(batch)
+        return count
+    
+    def _report(self, table: str, table_stats: Dict[str, float]):
+        print(f"📥 {table}: {table_stats['rows']} rows in {table_stats['seconds']:.2f}s "
+              f"({table_stats['rows_per_sec']:,.0f} rows/s)")
+
+
+class _FairAsyncPool:
+    """Async connection pool that hands each released connection to the longest waiter
+    
+    asyncio.Queue lets a task that releases and immediately re-acquires jump
+    ahead of woken waiters, which starves them under load and skews tails.
+    """
+    
+    def __init__(self, connections: List[Any]):
+        self.connections = connections
+        self._free = list(connections)
+        self._waiters = deque()
+    
+    async def get(self) -> Any:
+        if self._free:
+            return self._free.pop()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        return await waiter
+    
+    def put(self, conn: Any):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(conn)
+                return
+        self._free.append(conn)
+
+
+class _AsyncWorkload:
+    """Timed statements over a _FairAsyncPool, shared by the simulated workloads"""
+    
+    async def _execute(self, pool: _FairAsyncPool, action: str, query: str, params: tuple,
+                       latencies: Dict[str, List[float]], errors: Dict[str, int]):
+        start = time.perf_counter()
+        conn = await pool.get()
+        try:
+            await conn.execute(query, params)
+        except psycopg.Error:
+            errors[action] += 1
+            return
+        finally:
+            pool.put(conn)
+        latencies[action].append(time.perf_counter() - start)
+    
+    def _report(self, action: str, action_stats: Dict[str, float]):
+        print(f"⚡ {action}: {action_stats['ops']} ops ({action_stats['ops_per_sec']:,.1f} ops/s), "
+              f"p50 {action_stats['p50_ms']:.1f}ms, p95 {action_stats['p95_ms']:.1f}ms, "
+              f"p99 {action_stats['p99_ms']:.1f}ms, {action_stats['errors']} errors")
+
+
+class TrafficSimulator(_AsyncWorkload):
+    """Drive concurrent simulated clients against a loaded dataset with asyncio
+    
+    Every client is a generated user acting in its own rooms as a Poisson
+    process: sending messages (bracketed by typing indicator upserts), flipping
+    user_presence and calling mark_room_messages_read. Clients share a small
+    pool of async connections, so latencies include waiting for a connection
+    the way requests queue on a real backend. Messages fire the per-insert
+    triggers, which is the cost this is meant to size.
+    """
+    
+    def __init__(self, dsn: str, clients: int = 1000, connections: int = 20, message_rate: float = 6.0,
+                 presence_rate: float = 1.0, read_rate: float = 2.0):
+        if psycopg is None:
+            raise RuntimeError("Simulation needs psycopg 3: pip install 'psycopg[binary]'")
+        self.dsn = dsn
+        self.clients = max(1, clients)
+        self.connections = max(1, connections)
+        # Per-client rates are given per minute
+        self.rates = {'message': message_rate / 60, 'presence': presence_rate / 60, 'read': read_rate / 60}
+    
+    def run(self, generator: TestDataGenerator, duration: float) -> Dict[str, Dict[str, float]]:
+        """Simulate for duration seconds, returning per-action throughput and latency stats"""
+        return asyncio.run(self._run(generator, duration))
+    
+    async def _run(self, generator: TestDataGenerator, duration: float) -> Dict[str, Dict[str, float]]:
+        rooms_by_user = {}
+        for room in generator.rooms:
+            for participant_id in room['participants']:
+                rooms_by_user.setdefault(participant_id, []).append(room)
+        users = [user['id'] for user in generator.users if user['id'] in rooms_by_user]
+        if not users:
+            raise ValueError("Generate rooms first")
+        
+        pool = _FairAsyncPool([await psycopg.AsyncConnection.connect(self.dsn, autocommit=True)
+                               for _ in range(self.connections)])
+        
+        latencies = {action: [] for action in SIMULATED_ACTIONS}
+        errors = {action: 0 for action in SIMULATED_ACTIONS}
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*(
+                self._client(pool, users[i % len(users)], rooms_by_user[users[i % len(users)]], generator,
+                             random.Random(_derive_seed(generator.seed, 'simulate', i)),
+                             start + duration, latencies, errors)
+                for i in range(self.clients)
+            ))
+        finally:
+            for conn in pool.connections:
+                await conn.close()
+        elapsed = time.perf_counter() - start
+        
+        stats = {}
+        for action in SIMULATED_ACTIONS:
+            samples = latencies[action]
+            stats[action] = {'ops': len(samples), 'errors': errors[action], 'ops_per_sec': len(samples) / elapsed,
+                             **_latency_stats(samples)}
+            self._report(action, stats[action])
+        total = sum(len(samples) for samples in latencies.values())
+        stats['total'] = {'ops': total, 'errors': sum(errors.values()), 'ops_per_sec': total / elapsed,
+                          **_latency_stats([sample for samples in latencies.values() for sample in samples])}
+        self._report('total', stats['total'])
+        return stats
+    
+    async def _client(self, pool: _FairAsyncPool, user_id: str, rooms: List[Dict[str, Any]],
+                      generator: TestDataGenerator, rng: random.Random, deadline: float,
+                      latencies: Dict[str, List[float]], errors: Dict[str, int]):
+        actions = list(self.rates)
+        cum_weights = list(accumulate(self.rates.values()))
+        total_rate = cum_weights[-1]
+        online = False
+        
+        while True:
+            # Exponential think time makes each client a Poisson process
+            wake = time.perf_counter() + rng.expovariate(total_rate)
+            if wake >= deadline:
+                break
+            await asyncio.sleep(wake - time.perf_counter())
+            
+            action = rng.choices(actions, cum_weights=cum_weights)[0]
+            room = rng.choice(rooms)
+            if action == 'message':
+                content = generator._generate_message_content(rng, room, user_id)
+                await self._execute(pool, 'typing', SIMULATE_TYPING_SQL, (room['id'], user_id, True), latencies, errors)
+                await self._execute(pool, 'message', SIMULATE_MESSAGE_SQL,
+                                    (room['id'], user_id, content), latencies, errors)
+                await self._execute(pool, 'typing', SIMULATE_TYPING_SQL, (room['id'], user_id, False), latencies, errors)
+            elif action == 'presence':
+                online = not online
+                status = rng.choice(['available', 'away', 'busy']) if online else 'available'
+                await self._execute(pool, 'presence', SIMULATE_PRESENCE_SQL, (user_id, online, status),
+                                    latencies, errors)
+            else:
+                await self._execute(pool, 'read', SIMULATE_READ_SQL, (room['id'], user_id), latencies, errors)
+
+
+class ChurnReplayer(_AsyncWorkload):
+    """Replay iter_churn_events against a loaded dataset and measure what churn costs
+    
+    Events are sent at their offsets divided by ``speed`` (0 sends them as
+    fast as the pool allows) over a shared async pool, with
+    cleanup_typing_indicators() every ``cleanup_interval`` seconds of event
+    time. Timestamps come from now() as in the app, so the cleanup's
+    10-second staleness window is wall-clock time even when sped up. Size,
+    dead tuples and HOT updates of CHURN_TABLES are read before and after
+    to show bloat.
+    """
+    
+    def __init__(self, dsn: str, connections: int = 20, speed: float = 1.0, cleanup_interval: float = 30.0):
+        if psycopg is None:
+            raise RuntimeError("Churn replay needs psycopg 3: pip install 'psycopg[binary]'")
+        self.dsn = dsn
+        self.connections = max(1, connections)
+        self.speed = speed
+        self.cleanup_interval = cleanup_interval
+    
+    def run(self, events: Iterable[Tuple[float, str, str, Optional[str]]]) -> Dict[str, Dict[str, Any]]:
+        """Replay events, returning per-event throughput and latency stats plus table stats"""
+        return asyncio.run(self._run(events))
+    
+    async def _run(self, events: Iterable[Tuple[float, str, str, Optional[str]]]) -> Dict[str, Dict[str, Any]]:
+        tables_before = await self._table_stats()
+        pool = _FairAsyncPool([await psycopg.AsyncConnection.connect(self.dsn, autocommit=True)
+                               for _ in range(self.connections)])
+        
+        latencies = {event: [] for event in CHURN_EVENTS}
+        errors = {event: 0 for event in CHURN_EVENTS}
+        pending = set()
+        next_cleanup = self.cleanup_interval
+        start = time.perf_counter()
+        try:
+            for seconds, event, user_id, room_id in events:
+                while next_cleanup <= seconds:
+                    await self._send(pool, pending, next_cleanup, start, 'cleanup', CHURN_CLEANUP_SQL, (),
+                                     latencies, errors)
+                    next_cleanup += self.cleanup_interval
+                if event == 'typing_start' or event == 'typing_stop':
+                    query, params = SIMULATE_TYPING_SQL, (room_id, user_id, event == 'typing_start')
+                elif event == 'online':
+                    query, params = SIMULATE_PRESENCE_SQL, (user_id, True, 'available')
+                else:
+                    query, params = CHURN_OFFLINE_SQL, (user_id,)
+                await self._send(pool, pending, seconds, start, event, query, params, latencies, errors)
+            if pending:
+                await asyncio.wait(pending)
+        finally:
+            for conn in pool.connections:
+                await conn.close()
+        elapsed = time.perf_counter() - start
+        
+        stats = {}
+        for event in CHURN_EVENTS:
+            samples = latencies[event]
+            stats[event] = {'ops': len(samples), 'errors': errors[event], 'ops_per_sec': len(samples) / elapsed,
+                            **_latency_stats(samples)}
+            self._report(event, stats[event])
+        total = sum(len(samples) for samples in latencies.values())
+        stats['total'] = {'ops': total, 'errors': sum(errors.values()), 'ops_per_sec': total / elapsed,
+                          **_latency_stats([sample for samples in latencies.values() for sample in samples])}
+        self._report('total', stats['total'])
+        
+        # Closing the pool flushed its backends' table statistics
+        tables_after = await self._table_stats()
+        stats['tables'] = {table: {'before': tables_before.get(table), 'after': tables_after.get(table)}
+                           for table in CHURN_TABLES}
+        for table in CHURN_TABLES:
+            self._report_table(table, tables_before.get(table), tables_after.get(table))
+        return stats
+    
+    async def _send(self, pool: _FairAsyncPool, pending: set, seconds: float, start: float, event: str,
+                    query: str, params: tuple, latencies: Dict[str, List[float]], errors: Dict[str, int]):
+        if self.speed:
+            delay = start + seconds / self.speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        # Bound the backlog when the database falls behind the schedule
+        if len(pending) >= self.connections * 4:
+            await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        task = asyncio.create_task(self._execute(pool, event, query, params, latencies, errors))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    
+    async def _table_stats(self) -> Dict[str, Dict[str, int]]:
+        async with await psycopg.AsyncConnection.connect(self.dsn, autocommit=True) as conn:
+            cursor = await conn.execute(CHURN_TABLE_STATS_SQL, {'tables': list(CHURN_TABLES)})
+            return {CHURN_TABLES[position - 1]: {'table_bytes': table_bytes, 'index_bytes': index_bytes,
+                                                 'live_tuples': live, 'dead_tuples': dead, 'updates': updates,
+                                                 'hot_updates': hot_updates, 'autovacuums': autovacuums}
+                    for position, table_bytes, index_bytes, live, dead, updates, hot_updates, autovacuums
+                    in await cursor.fetchall()}
+    
+    def _report_table(self, table: str, before: Optional[Dict[str, int]], after: Optional[Dict[str, int]]):
+        if not before or not after:
+            print(f"🧹 {table}: no statistics")
+            return
+        updates = after['updates'] - before['updates']
+        hot_updates = after['hot_updates'] - before['hot_updates']
+        print(f"🧹 {table}: {before['table_bytes'] / 1e6:,.2f} -> {after['table_bytes'] / 1e6:,.2f} MB heap, "
+              f"{before['index_bytes'] / 1e6:,.2f} -> {after['index_bytes'] / 1e6:,.2f} MB indexes, "
+              f"{after['live_tuples']:,} live, {before['dead_tuples']:,} -> {after['dead_tuples']:,} dead tuples "
+              f"({after['dead_tuples'] - before['dead_tuples']:+,}), "
+              f"{hot_updates / updates if updates else 0:.0%} of {updates:,} updates HOT, "
+              f"{after['autovacuums'] - before['autovacuums']:,} autovacuums")
+
+
+def _json_record(record: Mapping) -> Dict[str, Any]:
+    """Copy a user, room or meeting dict with its datetimes formatted as ISO strings"""
+    out = {}
+    for key, value in record.items():
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, list) and value and isinstance(value[0], dict):
+            value = [_json_record(item) for item in value]
+        out[key] = value
+    return out
+
+
+def _message_json_records(rows: List[tuple], reaction_rows: List[tuple]) -> Iterator[Dict[str, Any]]:
+    """Rebuild message dicts, keyed like MESSAGE_KEYS, from one shard of rows"""
+    reactions = {}
+    for message_id, user_id, emoji, _created_at in reaction_rows:
+        reactions.setdefault(message_id, []).append({'user_id': user_id, 'emoji': emoji})
+    for message_id, room_id, user_id, content, type, reply_to, created_at, edited_at, deleted_at in rows:
+        yield {'id': message_id, 'room_id': room_id, 'user_id': user_id, 'content': content, 'type': type,
+               'reply_to': reply_to, 'created_at': created_at, 'reactions': reactions.get(message_id, []),
+               'edited_at': edited_at, 'deleted_at': deleted_at}
+
+
+class JsonlWriter:
+    """Write the dataset as JSON Lines for inspection and downstream tools
+    
+    Every line is ``{"entity": ..., "record": ...}`` with timestamps already
+    formatted, so the C encoder never calls back into Python. A ``header``
+    line comes first, then users, rooms, meetings and messages; messages are
+    written shard by shard, so ``tee_message_shards`` can export a streamed
+    run while SQL or the loader consumes it. Paths ending in ``.gz`` are
+    gzipped. ``read_jsonl`` streams the records back.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        if path.endswith('.gz'):
+            self._file = gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+        else:
+            self._file = open(path, 'w', encoding='utf-8', buffering=1024 * 1024)
+        self._encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+        self.counts = {}
+    
+    def __enter__(self) -> 'JsonlWriter':
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def write_records(self, entity: str, records: Iterable[Dict[str, Any]]):
+        prefix = f'{{"entity":"{entity}","record":'
+        encode = self._encode
+        records = iter(records)
+        while True:
+            lines = [f'{prefix}{encode(record)}}}\n' for record in islice(records, SQL_WRITE_CHUNK)]
+            if not lines:
+                break
+            self._file.writelines(lines)
+            self.counts[entity] = self.counts.get(entity, 0) + len(lines)
+    
+    def write_header(self, generator: 'TestDataGenerator'):
+        self.write_records('header', [{'generated_at': generator.reference_time.isoformat(),
+                                       'seed': generator.base_seed,
+                                       'delta': generator.epoch if generator.delta else None}])
+    
+    def write_base(self, generator: 'TestDataGenerator'):
+        """Write the header and everything but messages"""
+        self.write_header(generator)
+        if not generator.delta:
+            self.write_records('users', map(_json_record, generator.users))
+            self.write_records('rooms', map(_json_record, generator.rooms))
+        self.write_records('meetings', map(_json_record, generator.meetings))
+    
+    def write_message_shard(self, rows: List[tuple], reaction_rows: List[tuple]):
+        self.write_records('messages', _message_json_records(rows, reaction_rows))
+    
+    def tee_message_shards(self, shards: Iterable[Tuple[List[tuple], List[tuple]]]
+                           ) -> Iterator[Tuple[List[tuple], List[tuple]]]:
+        """Pass message shards through, writing each one on the way"""
+        for rows, reaction_rows in shards:
+            self.write_message_shard(rows, reaction_rows)
+            yield rows, reaction_rows
+    
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_jsonl(path: str, entities: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Stream (entity, record) pairs from a JsonlWriter file, optionally only some entities"""
+    wanted = None if entities is None else frozenset(entities)
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            if wanted is None or entry['entity'] in wanted:
+                yield entry['entity'], entry['record']
+
+
+class AttachmentWriter:
+    """Create an object file for every image, file and audio message
+    
+    Objects go to ``<directory>/<bucket>/<room_id>/<message_id>.<ext>``.
+    Each object's size comes from its message id, so it does not depend on
+    generation order or workers. ``attachments.jsonl`` lists message, bucket,
+    key, path, size and content type for benchmark-storage.py. Payloads never
+    sit in memory: ``sparse`` files are truncated to size and ``pattern``
+    files are filled block by block through a memory map, so S3 stand-ins
+    that compress or dedupe zero pages cannot shortcut the transfer.
+    """
+    
+    def __init__(self, directory: str, seed: int, fill: str = 'sparse',
+                 medians: Optional[Dict[str, int]] = None):
+        if fill not in ATTACHMENT_FILLS:
+            raise ValueError(f"Unknown attachment fill: {fill}")
+        self.directory = directory
+        self.seed = seed
+        self.fill = fill
+        self.medians = {kind: median for kind, (_b, _c, _e, median) in ATTACHMENT_TYPES.items()}
+        self.medians.update(medians or {})
+        self.objects = 0
+        self.bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = JsonlWriter(os.path.join(directory, 'attachments.jsonl'))
+    
+    def __enter__(self) -> 'AttachmentWriter':
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def object_size(self, kind: str, message_id: str) -> int:
+        """Log-normal size from the message id, by Box-Muller on two halves of its seed"""
+        seed = _derive_seed(self.seed, 'attachment', message_id)
+        u1 = ((seed >> 32) + 0.5) / 0x100000000
+        u2 = (seed & 0xFFFFFFFF) / 0x100000000
+        normal = math.sqrt(-2 * math.log(u1)) * math.cos(2 * math.pi * u2)
+        size = int(self.medians[kind] * math.exp(ATTACHMENT_SIZE_SIGMA * normal))
+        return max(ATTACHMENT_MIN_BYTES, min(ATTACHMENT_BUCKET_LIMITS[ATTACHMENT_TYPES[kind][0]], size))
+    
+    def write_message_shard(self, rows: List[tuple]):
+        records = []
+        for message_id, room_id, _user_id, _content, kind, *_ in rows:
+            if kind not in ATTACHMENT_TYPES:
+                continue
+            bucket, content_type, extension, _median = ATTACHMENT_TYPES[kind]
+            key = f'{room_id}/{message_id}.{extension}'
+            size = self.object_size(kind, message_id)
+            self._write_object(os.path.join(self.directory, bucket, key), size, message_id)
+            records.append({'message_id': message_id, 'bucket': bucket, 'key': key, 'path': f'{bucket}/{key}',
+                            'size': size, 'content_type': content_type})
+            self.bytes += size
+        self.objects += len(records)
+        self.manifest.write_records('attachments', records)
+    
+    def tee_message_shards(self, shards: Iterable[Tuple[List[tuple], List[tuple]]]
+                           ) -> Iterator[Tuple[List[tuple], List[tuple]]]:
+        """Pass message shards through, creating their attachments on the way"""
+        for rows, reaction_rows in shards:
+            self.write_message_shard(rows)
+            yield rows, reaction_rows
+    
+    def _write_object(self, path: str, size: int, message_id: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.truncate(size)
+        if self.fill == 'pattern':
+            block = memoryview(random.Random(_derive_seed(self.seed, 'attachment-body', message_id)).randbytes(
+                ATTACHMENT_PATTERN_BYTES))
+            with open(path, 'r+b') as f, mmap.mmap(f.fileno(), size) as view:
+                for offset in range(0, size, ATTACHMENT_PATTERN_BYTES):
+                    end = min(offset + ATTACHMENT_PATTERN_BYTES, size)
+                    view[offset:end] = block[:end - offset]
+    
+    def close(self):
+        self.manifest.close()
+
+
+def _peak_rss_mb(who: int) -> Optional[float]:
+    """Peak resident set size of this process or its largest child, in MiB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in KiB on Linux but bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class PhaseProfiler:
+    """Measure main()'s phases: wall and CPU time, rows/s, bytes and peak RSS
+    
+    Each ``phase()`` block yields a dict the caller fills with ``rows`` and
+    ``bytes``; rates are derived when the block ends. With ``profile_dir``
+    every phase also runs under cProfile and is dumped to ``<phase>.prof``.
+    """
+    
+    def __init__(self, report: bool = False, profile_dir: Optional[str] = None):
+        self.report = report or profile_dir is not None
+        self.profile_dir = profile_dir
+        self.phases = {}
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+    
+    @contextmanager
+    def phase(self, name: str) -> Iterator[Dict[str, Any]]:
+        record = {}
+        profiler = cProfile.Profile() if self.profile_dir else None
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(os.path.join(self.profile_dir, f'{name}.prof'))
+            record['seconds'] = time.perf_counter() - start
+            record['cpu_seconds'] = time.process_time() - cpu_start
+            for key in ('rows', 'bytes'):
+                if key in record:
+                    record[f'{key}_per_sec'] = record[key] / record['seconds'] if record['seconds'] else 0.0
+            record['peak_rss_mb'] = _peak_rss_mb(resource.RUSAGE_SELF) if resource else None
+            record['children_peak_rss_mb'] = _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None
+            self.phases[name] = record
+            if self.report:
+                self._report(name, record)
+    
+    def write_json(self, path: str, **extra: Any):
+        with open(path, 'w') as f:
+            json.dump({**extra, 'phases': self.phases}, f, indent=2)
+    
+    def _report(self, name: str, record: Dict[str, Any]):
+        line = f"⏱️ {name}: {record['seconds']:.2f}s (cpu {record['cpu_seconds']:.2f}s)"
+        if 'rows' in record:
+            line += f", {record['rows']:,} rows ({record['rows_per_sec']:,.0f} rows/s)"
+        if 'bytes' in record:
+            line += f", {record['bytes'] / 1e6:,.1f} MB ({record['bytes_per_sec'] / 1e6:,.1f} MB/s)"
+        if record['peak_rss_mb'] is not None:
+            line += f", peak RSS {record['peak_rss_mb']:,.0f} MiB"
+        print(line)
+
+
+# Options that do not change the generated bytes and so stay out of cache keys
+_CACHE_NEUTRAL_OPTIONS = ('output', 'json', 'jsonl', 'workers', 'cache_dir', 'stream', 'profile',
+                          'profile_dir', 'stats_json')
+
+
+def _dataset_cache_key(args: argparse.Namespace) -> str:
+    """Hash the generation parameters and this script's source into a cache key"""
+    params = {k: v for k, v in sorted(vars(args).items()) if k not in _CACHE_NEUTRAL_OPTIONS}
+    params['with_json'] = bool(args.json)
+    params['with_jsonl'] = os.path.splitext(args.jsonl)[1] if args.jsonl else None
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode())
+    with open(__file__, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _cached_dataset_paths(cache_dir: str, key: str, args: argparse.Namespace) -> List[Tuple[str, str]]:
+    """Pair each cached file with the output path it serves"""
+    pairs = [(os.path.join(cache_dir, f'{key}.sql'), args.output)]
+    if args.json:
+        pairs.append((os.path.join(cache_dir, f'{key}.json'), args.json))
+    if args.jsonl:
+        pairs.append((os.path.join(cache_dir, f'{key}.jsonl'), args.jsonl))
+    return pairs
+
+
+def _restore_cached_dataset(cache_dir: str, key: str, args: argparse.Namespace) -> bool:
+    """Copy a cached dataset to the requested outputs, if every file is cached"""
+    pairs = _cached_dataset_paths(cache_dir, key, args)
+    if not all(os.path.exists(cached) for cached, _ in pairs):
+        return False
+    for cached, target in pairs:
+        shutil.copyfile(cached, target)
+    return True
+
+
+def _store_cached_dataset(cache_dir: str, key: str, args: argparse.Namespace):
+    """Copy freshly generated outputs into the cache atomically"""
+    os.makedirs(cache_dir, exist_ok=True)
+    for cached, source in _cached_dataset_paths(cache_dir, key, args):
+        partial = f'{cached}.{os.getpid()}.tmp'
+        shutil.copyfile(source, partial)
+        os.replace(partial, cached)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Generate comprehensive test data for WhatsApp Clone')
     parser.add_argument('--users', type=int, default=20, help='Number of users to generate')
-    parser.add_argument('--messages-per-room', type=int, default=15, help='Average messages per room')
+    parser.add_argument('--messages-per-room', type=int, default=15,
+                        help='Average messages per room; an --append scales it to the time since the snapshot')
     parser.add_argument('--meetings', type=int, default=8, help='Number of meetings to generate')
     parser.add_argument('--output', type=str, default='supabase/advanced_seed.sql', help='Output SQL file')
     parser.add_argument('--json', type=str, help='Output JSON file for data inspection')
+    parser.add_argument('--jsonl', type=str,
+                        help='Output JSON Lines file, one record per line and written as data is generated; '
+                             'works with --stream and --append (.gz to compress)')
+    parser.add_argument('--format', choices=SQL_FORMATS, default='insert',
+                        help='SQL output style: one INSERT per row, multi-row INSERT batches, '
+                             'or COPY FROM STDIN blocks for fast psql loads')
+    parser.add_argument('--topology', choices=ROOM_TOPOLOGIES, default='classic',
+                        help='classic: a fixed handful of rooms; realistic: rooms scaled to --users with '
+                             'heavy-tailed group sizes and message volumes')
+    parser.add_argument('--rooms-per-user', type=float, default=5.0,
+                        help='Rooms per user with --topology realistic')
+    parser.add_argument('--direct-room-ratio', type=float, default=0.7,
+                        help='Share of direct (1:1) rooms with --topology realistic')
+    parser.add_argument('--max-group-size', type=int, default=5000,
+                        help='Largest group with --topology realistic')
+    parser.add_argument('--content', choices=CONTENT_MODES, default='templates',
+                        help='Message text: the fixed templates, or a multilingual Zipfian corpus for search tests')
+    parser.add_argument('--vocabulary', type=int, default=50000,
+                        help='Distinct words across all languages with --content corpus')
+    parser.add_argument('--zipf-exponent', type=float, default=CORPUS_ZIPF_EXPONENT,
+                        help='Word frequency falls off as 1/rank**exponent with --content corpus')
+    parser.add_argument('--needle', action='append', default=[], metavar='TERM:RATE',
+                        help='With --content corpus, put TERM into this share of messages and report how many '
+                             'hold it (repeatable)')
+    parser.add_argument('--backend', choices=GENERATION_BACKENDS, default='python',
+                        help='Message generation backend; numpy builds whole columns per shard (implies --stream). '
+                             'At 2,000 users it writes messages and reactions about 9x faster and a whole '
+                             'COPY file about 4x faster, but peaks about 36 MiB (1.4x) higher in memory')
+    parser.add_argument('--seed', type=int, help='Base seed for all random streams (random if omitted)')
+    parser.add_argument('--reference-time', type=datetime.fromisoformat,
+                        help='ISO timestamp used as "now" for all generated times (defaults to the current time)')
+    parser.add_argument('--cache-dir', type=str,
+                        help='Reuse datasets cached here under a key of all generation parameters '
+                             '(requires --seed and --reference-time)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes used for room and message generation; output does not depend on it')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='Rows per INSERT statement with --format batch')
+    parser.add_argument('--commit-every', type=int, default=0,
+                        help='Wrap every N INSERT statements in BEGIN/COMMIT (0 disables)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Report wall/CPU time, rows/s, bytes written and peak RSS for every phase')
+    parser.add_argument('--profile-dir', type=str,
+                        help='Also run every phase under cProfile and dump <phase>.prof files here (implies --profile)')
+    parser.add_argument('--stats-json', type=str, help='Write the per-phase stats to this JSON file')
+    parser.add_argument('--state', type=str,
+                        help='Save a snapshot of users, rooms, last message per room and seed here for --append')
+    parser.add_argument('--append', action='store_true',
+                        help='Continue the dataset saved in --state: emit only new messages, reactions and '
+                             'meetings up to --reference-time, clear nothing, and update the snapshot. Each '
+                             'room gets its base message volume scaled by the time since the snapshot '
+                             'relative to its history')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream messages straight into the SQL file instead of holding them in memory')
+    parser.add_argument('--load-dsn', type=str,
+                        help='Load rows straight into this Postgres DSN instead of writing --output (needs psycopg)')
+    parser.add_argument('--load-method', choices=LOAD_METHODS, default='copy',
+                        help='How --load-dsn sends rows: COPY, or pipelined batched INSERTs of --batch-size rows')
+    parser.add_argument('--load-connections', type=int, default=4,
+                        help='Connections in the --load-dsn pool; tables of one load stage use one each')
+    parser.add_argument('--simulate', type=float, metavar='SECONDS',
+                        help='After --load-dsn, run concurrent simulated clients against the database '
+                             'for this many seconds and report throughput and latency')
+    parser.add_argument('--clients', type=int, default=1000, help='Simulated clients with --simulate')
+    parser.add_argument('--message-rate', type=float, default=6.0,
+                        help='Messages sent per client per minute with --simulate')
+    parser.add_argument('--presence-rate', type=float, default=1.0,
+                        help='Presence flips per client per minute with --simulate, or per user with --churn')
+    parser.add_argument('--read-rate', type=float, default=2.0,
+                        help='mark_room_messages_read calls per client per minute with --simulate')
+    parser.add_argument('--simulate-connections', type=int, default=20,
+                        help='Connections shared by simulated clients and the --churn replay')
+    parser.add_argument('--churn', type=float, metavar='SECONDS',
+                        help='Generate this many seconds of typing and presence churn for every user; replayed '
+                             'against --load-dsn after loading and/or written to --churn-events')
+    parser.add_argument('--typing-rate', type=float, default=2.0,
+                        help='Typing bursts per user per minute with --churn')
+    parser.add_argument('--churn-speed', type=float, default=1.0,
+                        help='Replay --churn this many times faster than real time (0 for as fast as possible)')
+    parser.add_argument('--cleanup-interval', type=float, default=30.0,
+                        help='Seconds of --churn between cleanup_typing_indicators() calls')
+    parser.add_argument('--churn-events', type=str,
+                        help='Write the --churn event stream to this JSON Lines file (.gz to compress)')
+    parser.add_argument('--output-dir', type=str,
+                        help='Instead of --output, write one SQL file per table chunk plus manifest.json here')
+    parser.add_argument('--compress', choices=tuple(COMPRESSIONS), default='none',
+                        help='Compress --output-dir chunks (zstd needs zstandard)')
+    parser.add_argument('--chunk-mb', type=float, default=DEFAULT_CHUNK_BYTES / (1024 * 1024),
+                        help='Uncompressed MB after which an --output-dir chunk is closed')
+    parser.add_argument('--attachments-dir', type=str,
+                        help='Create an object file for every image, file and audio message here, listed in '
+                             'attachments.jsonl for benchmark-storage.py')
+    parser.add_argument('--attachment-fill', choices=ATTACHMENT_FILLS, default='sparse',
+                        help='Write attachment bodies as sparse files or as a repeated pseudo-random pattern')
+    parser.add_argument('--attachment-median', action='append', default=[], metavar='TYPE=KB',
+                        help='Median attachment size in KiB for image, file or audio messages (repeatable)')
+    parser.add_argument('--defer-triggers', action='store_true',
+                        help='Disable the per-message status/last_message triggers during the load and '
+                             'write message_status rows and rooms.last_message_at directly')
     
     args = parser.parse_args()
     
+    if args.rooms_per_user <= 0:
+        parser.error('--rooms-per-user must be positive')
+    if not 0 <= args.direct_room_ratio <= 1:
+        parser.error('--direct-room-ratio must be between 0 and 1')
+    if args.max_group_size < MIN_GROUP_SIZE:
+        parser.error(f'--max-group-size must be at least {MIN_GROUP_SIZE}')
+    if args.batch_size < 1:
+        parser.error('--batch-size must be at least 1')
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    if args.commit_every < 0:
+        parser.error('--commit-every cannot be negative')
+    if args.commit_every and args.format == 'copy':
+        parser.error('--commit-every wraps INSERT statements and does not apply to --format copy')
+    needles = []
+    for needle in args.needle:
+        term, _, rate = needle.rpartition(':')
+        try:
+            rate = float(rate)
+        except ValueError:
+            parser.error(f'--needle {needle}: expected TERM:RATE')
+        if not term or any(c.isspace() for c in term) or not 0 < rate <= 1:
+            parser.error(f'--needle {needle}: TERM must be one word and RATE in (0, 1]')
+        needles.append((term, rate))
+    attachment_medians = {}
+    for median in args.attachment_median:
+        kind, _, kib = median.partition('=')
+        try:
+            attachment_medians[kind] = int(float(kib) * 1024)
+        except ValueError:
+            parser.error(f'--attachment-median {median}: expected TYPE=KB')
+        if kind not in ATTACHMENT_TYPES or attachment_medians[kind] < 1:
+            parser.error(f'--attachment-median {median}: TYPE is one of {", ".join(ATTACHMENT_TYPES)} '
+                         f'and KB is positive')
+    if (attachment_medians or args.attachment_fill != 'sparse') and not args.attachments_dir:
+        parser.error('--attachment-median and --attachment-fill need --attachments-dir')
+    if args.attachments_dir and args.cache_dir:
+        parser.error('--attachments-dir writes outside the dataset cache and cannot be combined with --cache-dir')
+    if args.content == 'corpus':
+        if args.vocabulary < 1 or args.zipf_exponent <= 0:
+            parser.error('--vocabulary and --zipf-exponent must be positive')
+    elif needles:
+        parser.error('--needle needs --content corpus')
+    if args.backend == 'numpy':
+        if np is None:
+            parser.error('--backend numpy needs NumPy: pip install numpy')
+        args.stream = True
+    if args.stream and args.json:
+        parser.error('--json needs the full dataset in memory and cannot be combined with --stream '
+                     'or --backend numpy; use --jsonl')
+    if args.load_connections < 1:
+        parser.error('--load-connections must be at least 1')
+    if args.load_dsn and args.cache_dir:
+        parser.error('--cache-dir caches output files and cannot be combined with --load-dsn')
+    if args.output_dir:
+        if args.load_dsn or args.cache_dir:
+            parser.error('--output-dir writes files and cannot be combined with --load-dsn or --cache-dir')
+        if args.commit_every:
+            parser.error('--output-dir loads every chunk in one transaction and does not take --commit-every')
+        if args.chunk_mb <= 0:
+            parser.error('--chunk-mb must be positive')
+        if args.compress == 'zstd' and zstandard is None:
+            parser.error('--compress zstd needs zstandard: pip install zstandard')
+    elif args.compress != 'none':
+        parser.error('--compress only applies to --output-dir')
+    if args.load_dsn and psycopg is None:
+        parser.error("--load-dsn needs psycopg 3: pip install 'psycopg[binary]'")
+    if args.simulate is not None:
+        if not args.load_dsn:
+            parser.error('--simulate runs against the loaded dataset and needs --load-dsn')
+        if args.simulate <= 0:
+            parser.error('--simulate must be a positive number of seconds')
+        if args.clients < 1 or args.simulate_connections < 1:
+            parser.error('--clients and --simulate-connections must be at least 1')
+        if min(args.message_rate, args.presence_rate, args.read_rate) < 0 or \
+                args.message_rate + args.presence_rate + args.read_rate == 0:
+            parser.error('simulated client rates cannot be negative and at least one must be positive')
+    if args.churn is not None:
+        if args.churn <= 0:
+            parser.error('--churn must be a positive number of seconds')
+        if not (args.load_dsn or args.churn_events):
+            parser.error('--churn needs --load-dsn to replay against or --churn-events to write to')
+        if min(args.typing_rate, args.presence_rate) < 0 or args.typing_rate + args.presence_rate == 0:
+            parser.error('--typing-rate and --presence-rate cannot be negative and one must be positive')
+        if args.churn_speed < 0:
+            parser.error('--churn-speed cannot be negative')
+        if args.cleanup_interval <= 0:
+            parser.error('--cleanup-interval must be positive')
+        if args.simulate_connections < 1:
+            parser.error('--simulate-connections must be at least 1')
+        if args.cache_dir:
+            parser.error('--churn writes outside the dataset cache and cannot be combined with --cache-dir')
+    elif args.churn_events:
+        parser.error('--churn-events needs --churn')
+    if args.append:
+        if not args.state:
+            parser.error('--append needs --state pointing at a snapshot from an earlier run')
+        if args.seed is not None:
+            parser.error('--append continues the seed saved in --state and does not take --seed')
+        if args.json:
+            parser.error('--json needs the full dataset and cannot be combined with --append; use --jsonl')
+    if args.state and args.cache_dir:
+        parser.error('--state needs the generated data and cannot be combined with --cache-dir')
+    if args.cache_dir and (args.seed is None or args.reference_time is None):
+        parser.error('--cache-dir needs --seed and --reference-time, otherwise output is not reproducible')
+    
+    cache_key = _dataset_cache_key(args) if args.cache_dir else None
+    if cache_key and _restore_cached_dataset(args.cache_dir, cache_key, args):
+        print(f"♻️ Reused cached dataset {cache_key[:12]} from {args.cache_dir}")
+        print("🎉 Test data generation completed!")
+        return
+    
     print("🎲 Generating advanced test data...")
+    profiler = PhaseProfiler(report=args.profile, profile_dir=args.profile_dir)
+    
+    if args.append:
+        try:
+            generator = TestDataGenerator.from_state(args.state, workers=args.workers,
+                                                     reference_time=args.reference_time, backend=args.backend)
+        except (OSError, ValueError) as e:
+            parser.error(f'--append: {e}')
+        print(f"🌱 Seed: {generator.base_seed} (append #{generator.epoch}), "
+              f"reference time: {generator.reference_time.isoformat()}")
+        
+        # Users and rooms already exist; only new activity is generated
+        users = generator.users
+        rooms = generator.rooms
+    else:
+        generator = TestDataGenerator(seed=args.seed, workers=args.workers, reference_time=args.reference_time,
+                                      backend=args.backend)
+        print(f"🌱 Seed: {generator.seed}, reference time: {generator.reference_time.isoformat()}")
+        
+        # Generate all data
+        with profiler.phase('generate_users') as phase:
+            users = generator.generate_users(args.users)
+            phase['rows'] = len(users)
+        with profiler.phase('generate_rooms') as phase:
+            rooms = generator.generate_rooms(topology=args.topology, rooms_per_user=args.rooms_per_user,
+                                             direct_ratio=args.direct_room_ratio,
+                                             max_group_size=args.max_group_size)
+            phase['rows'] = len(rooms)
+    
+    if args.content == 'corpus':
+        generator.corpus = TextCorpus(generator.base_seed, vocabulary_size=args.vocabulary,
+                                      zipf_exponent=args.zipf_exponent, needles=needles)
+    
+    if args.stream:
+        # Message rows are produced while the output consumes them, so their
+        # generation is timed as part of the output phase
+        with profiler.phase('generate_meetings') as phase:
+            meetings = generator.generate_meetings(args.meetings)
+            phase['rows'] = len(meetings)
+        message_shards = generator.iter_message_shards(args.messages_per_room)
+        if args.jsonl:
+            jsonl = JsonlWriter(args.jsonl)
+            jsonl.write_base(generator)
+            message_shards = jsonl.tee_message_shards(message_shards)
+        if args.attachments_dir:
+            attachments = AttachmentWriter(args.attachments_dir, generator.base_seed, fill=args.attachment_fill,
+                                           medians=attachment_medians)
+            attachments.manifest.write_header(generator)
+            message_shards = attachments.tee_message_shards(message_shards)
+    else:
+        with profiler.phase('generate_messages') as phase:
+            messages = generator.generate_messages(args.messages_per_room)
+            phase['rows'] = len(messages)
+        with profiler.phase('generate_meetings') as phase:
+            meetings = generator.generate_meetings(args.meetings)
+            phase['rows'] = len(meetings)
+        message_shards = None
+        
+        print(f"✅ Generated: {len(users)} users, {len(rooms)} rooms, {len(messages)} messages, {len(meetings)} meetings")
+    
+    if args.load_dsn:
+        with profiler.phase('load') as phase:
+            loader = PostgresLoader(args.load_dsn, connections=args.load_connections, method=args.load_method,
+                                    batch_size=args.batch_size, defer_triggers=args.defer_triggers)
+            load_stats = loader.load(generator, message_shards=message_shards)
+            phase['rows'] = sum(int(table_stats['rows']) for table_stats in load_stats.values())
+        
+        if args.simulate is not None:
+            print(f"🚦 Simulating {args.clients} clients for {args.simulate:g}s...")
+            with profiler.phase('simulate') as phase:
+                simulator = TrafficSimulator(args.load_dsn, clients=args.clients,
+                                             connections=args.simulate_connections, message_rate=args.message_rate,
+                                             presence_rate=args.presence_rate, read_rate=args.read_rate)
+                phase['rows'] = simulator.run(generator, args.simulate)['total']['ops']
+    elif args.output_dir:
+        with profiler.phase('write_sql_dir') as phase:
+            manifest = generator.write_sql_dir(args.output_dir, fmt=args.format, batch_size=args.batch_size,
+                                               defer_triggers=args.defer_triggers, message_shards=message_shards,
+                                               compression=args.compress,
+                                               chunk_bytes=int(args.chunk_mb * 1024 * 1024))
+            chunks = [chunk for stage in manifest['stages'] for chunk in stage['files']]
+            phase['rows'] = sum(chunk['rows'] for chunk in chunks)
+            phase['bytes'] = sum(chunk['bytes'] for chunk in chunks)
+    else:
+        # Output SQL
+        with profiler.phase('write_sql') as phase:
+            phase['lines'] = generator.write_sql(args.output, fmt=args.format, batch_size=args.batch_size,
+                                                 commit_every=args.commit_every, defer_triggers=args.defer_triggers,
+                                                 message_shards=message_shards)
+            phase['rows'] = sum(generator.table_rows.values())
+            phase['bytes'] = os.path.getsize(args.output)
     
-    generator = TestDataGenerator()
+    if args.churn is not None:
+        if args.churn_events:
+            with profiler.phase('write_churn_events') as phase:
+                with JsonlWriter(args.churn_events) as churn_file:
+                    churn_file.write_header(generator)
+                    churn_file.write_records('churn', (
+                        {'seconds': round(seconds, 6), 'event': event, 'user_id': user_id, 'room_id': room_id}
+                        for seconds, event, user_id, room_id in generator.iter_churn_events(
+                            args.churn, typing_rate=args.typing_rate, presence_rate=args.presence_rate)
+                    ))
+                phase['rows'] = churn_file.counts.get('churn', 0)
+                phase['bytes'] = os.path.getsize(args.churn_events)
+            print(f"🌪️ {phase['rows']:,} churn events saved to {args.churn_events}")
+        
+        if args.load_dsn:
+            print(f"🌪️ Replaying {args.churn:g}s of typing and presence churn "
+                  f"{'as fast as possible' if not args.churn_speed else f'at {args.churn_speed:g}x'}...")
+            with profiler.phase('churn') as phase:
+                replayer = ChurnReplayer(args.load_dsn, connections=args.simulate_connections,
+                                         speed=args.churn_speed, cleanup_interval=args.cleanup_interval)
+                phase['rows'] = replayer.run(generator.iter_churn_events(
+                    args.churn, typing_rate=args.typing_rate, presence_rate=args.presence_rate))['total']['ops']
+    
+    if args.jsonl:
+        if args.stream:
+            jsonl.close()
+        else:
+            with profiler.phase('write_jsonl') as phase:
+                with JsonlWriter(args.jsonl) as jsonl:
+                    jsonl.write_base(generator)
+                    for rows, reaction_rows in _chunked_message_rows(messages):
+                        jsonl.write_message_shard(rows, reaction_rows)
+                phase['rows'] = sum(jsonl.counts.values())
+                phase['bytes'] = os.path.getsize(args.jsonl)
+        print(f"📜 JSON Lines saved to {args.jsonl}")
     
-    # Generate all data
-    users = generator.generate_users(args.users)
-    rooms = generator.generate_rooms()
-    messages = generator.generate_messages(args.messages_per_room)
-    meetings = generator.generate_meetings(args.meetings)
+    if args.attachments_dir:
+        if args.stream:
+            attachments.close()
+        else:
+            with profiler.phase('write_attachments') as phase:
+                with AttachmentWriter(args.attachments_dir, generator.base_seed, fill=args.attachment_fill,
+                                      medians=attachment_medians) as attachments:
+                    attachments.manifest.write_header(generator)
+                    for rows, _reaction_rows in _chunked_message_rows(messages):
+                        attachments.write_message_shard(rows)
+                phase['rows'] = attachments.objects
+                phase['bytes'] = attachments.bytes
+        print(f"📎 {attachments.objects:,} attachments ({attachments.bytes / 1e6:,.1f} MB, "
+              f"{args.attachment_fill}) saved to {args.attachments_dir}")
     
-    print(f"✅ Generated: {len(users)} users, {len(rooms)} rooms, {len(messages)} messages, {len(meetings)} meetings")
+    for needle, count in generator.needle_counts.items():
+        print(f"🪡 Needle {needle!r} is in {count:,} messages")
     
-    # Output SQL
-    sql_content = generator.generate_sql(args.output)
+    if args.stream:
+        print(f"✅ Generated: {len(users)} users, {len(rooms)} rooms, {generator.message_count} messages, {len(meetings)} meetings")
     
     # Output JSON if requested
     if args.json:
@@ -510,20 +3186,41 @@ def main():
             'rooms': rooms,
             'messages': messages,
             'meetings': meetings,
-            'generated_at': datetime.now().isoformat()
+            'generated_at': generator.reference_time.isoformat()
         }
         
-        # Convert datetime objects to strings for JSON serialization
+        # Convert datetime objects to strings and message records to dicts for JSON serialization
         def serialize_datetime(obj):
             if isinstance(obj, datetime):
                 return obj.isoformat()
+            if isinstance(obj, MessageRecord):
+                return dict(obj)
             raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
         
-        with open(args.json, 'w') as f:
-            json.dump(data, f, indent=2, default=serialize_datetime)
+        with profiler.phase('write_json') as phase:
+            with open(args.json, 'w') as f:
+                json.dump(data, f, indent=2, default=serialize_datetime)
+            phase['bytes'] = os.path.getsize(args.json)
         
         print(f"📊 JSON data saved to {args.json}")
     
+    if args.state:
+        with profiler.phase('save_state') as phase:
+            generator.save_state(args.state)
+            phase['bytes'] = os.path.getsize(args.state)
+        print(f"🧭 State snapshot saved to {args.state}")
+    
+    if cache_key:
+        _store_cached_dataset(args.cache_dir, cache_key, args)
+        print(f"💾 Cached dataset {cache_key[:12]} in {args.cache_dir}")
+    
+    if args.stats_json:
+        profiler.write_json(args.stats_json, seed=generator.base_seed, workers=args.workers, backend=args.backend,
+                            reference_time=generator.reference_time.isoformat(),
+                            message_count=generator.message_count or len(generator.messages),
+                            needles=generator.needle_counts)
+        print(f"📈 Phase stats saved to {args.stats_json}")
+    
     print("🎉 Test data generation completed!")
 
 if __name__ == '__main__':